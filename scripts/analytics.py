@@ -0,0 +1,197 @@
+import json
+import math
+import os
+from pathlib import Path
+
+from history_store import HistoryStore, to_micros, from_micros
+from tick_log import write_atomic
+
+# --------------------------------------------------
+# Online index analytics
+#
+# Maintained per tick from the history store, O(1) amortized:
+#
+#   returns     1d / 7d / 30d: value / value at (t - window) - 1
+#   volatility  rolling stdev of tick log returns per window
+#               (windowed Welford: add the new return, remove the
+#               returns of ticks that left the window)
+#   drawdown    running peak, current and max drawdown
+#
+# Each window keeps a cursor ("cutoff") into the history and the
+# value of the last tick at or before t - window ("edge"), which
+# is both the return anchor and the predecessor of the next tick
+# to leave the window. Only ticks crossing the cutoff are read.
+#
+# State: index_data/analytics_state.json (next to index_state.json)
+# Published: docs/data/index_analytics.json
+# --------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+STATE_FILE = BASE_DIR / "index_data" / "analytics_state.json"
+ANALYTICS_JSON = BASE_DIR / "docs" / "data" / "index_analytics.json"
+
+DAY_US = 86400 * 10**6
+YEAR_US = 365 * DAY_US
+
+WINDOWS = {
+    "1d": DAY_US,
+    "7d": 7 * DAY_US,
+    "30d": 30 * DAY_US,
+}
+
+
+def new_state():
+    return {
+        "rows": 0,
+        "last_time": None,
+        "last_value": None,
+        "peak": None,
+        "peak_at": None,
+        "max_drawdown": 0.0,
+        "max_drawdown_at": None,
+        "windows": {
+            name: {"cutoff": None, "edge": None, "n": 0, "mean": 0.0, "m2": 0.0}
+            for name in WINDOWS
+        },
+    }
+
+
+def load_state():
+    if not STATE_FILE.exists():
+        return None
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+
+def save_state(state):
+    tmp = STATE_FILE.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+
+# --------------------------------------------------
+# Windowed Welford
+# --------------------------------------------------
+
+def welford_add(w, x):
+    w["n"] += 1
+    d = x - w["mean"]
+    w["mean"] += d / w["n"]
+    w["m2"] += d * (x - w["mean"])
+
+
+def welford_remove(w, x):
+    if w["n"] <= 1:
+        w["n"], w["mean"], w["m2"] = 0, 0.0, 0.0
+        return
+    w["n"] -= 1
+    d = x - w["mean"]
+    w["mean"] -= d / w["n"]
+    w["m2"] = max(w["m2"] - d * (x - w["mean"]), 0.0)
+
+
+# --------------------------------------------------
+# Per-tick step
+# --------------------------------------------------
+
+def step(state, store, timestamp, value):
+    us = to_micros(timestamp)
+
+    if state["last_value"] is not None:
+        r = math.log(value / state["last_value"])
+        for w in state["windows"].values():
+            welford_add(w, r)
+
+    # Ticks at or before t - window leave it
+    for name, w in state["windows"].items():
+        cutoff = us - WINDOWS[name] + 1
+        if w["cutoff"] is not None and cutoff <= w["cutoff"]:
+            continue
+
+        start = None if w["cutoff"] is None else from_micros(w["cutoff"])
+        for p in store.read_range(start, from_micros(cutoff)):
+            if w["edge"] is not None:
+                welford_remove(w, math.log(p["index_value"] / w["edge"]))
+            w["edge"] = p["index_value"]
+        w["cutoff"] = cutoff
+
+    if state["peak"] is None or value >= state["peak"]:
+        state["peak"], state["peak_at"] = value, timestamp
+    drawdown = value / state["peak"] - 1
+    if drawdown < state["max_drawdown"]:
+        state["max_drawdown"], state["max_drawdown_at"] = drawdown, timestamp
+
+    state["rows"] += 1
+    state["last_time"] = timestamp
+    state["last_value"] = value
+
+
+def rebuild(store):
+    state = new_state()
+    for p in store.read_range():
+        step(state, store, p["timestamp_utc"], p["index_value"])
+    return state
+
+
+# --------------------------------------------------
+# Publish
+# --------------------------------------------------
+
+def summary(state):
+    returns = {}
+    volatility = {}
+    for name, w in state["windows"].items():
+        returns[name] = None if w["edge"] is None else state["last_value"] / w["edge"] - 1
+
+        if w["n"] < 2:
+            volatility[name] = None
+            continue
+        stdev = math.sqrt(w["m2"] / (w["n"] - 1))
+        volatility[name] = {
+            "ticks": w["n"],
+            "stdev_per_tick": stdev,
+            # ticks per year estimated from the window's own density
+            "annualized": stdev * math.sqrt(w["n"] * YEAR_US / WINDOWS[name]),
+        }
+
+    return {
+        "as_of": state["last_time"],
+        "value": state["last_value"],
+        "returns": returns,
+        "volatility": volatility,
+        "drawdown": {
+            "peak": state["peak"],
+            "peak_at": state["peak_at"],
+            "current": state["last_value"] / state["peak"] - 1,
+            "max": state["max_drawdown"],
+            "max_at": state["max_drawdown_at"],
+        },
+    }
+
+
+def update(store, timestamp, index_value):
+    # Called once per tick after the history row is persisted
+    state = load_state()
+    if state is None or state["rows"] != len(store) - 1:
+        # First run, or history changed underneath: replay it once
+        state = rebuild(store)
+    else:
+        step(state, store, timestamp, float(index_value))
+
+    return publish(state)
+
+
+def publish(state):
+    save_state(state)
+
+    payload = summary(state)
+    write_atomic(ANALYTICS_JSON, json.dumps(payload, indent=2))
+    return payload
+
+
+if __name__ == "__main__":
+    # python scripts/analytics.py  → rebuild state and publish from the full history
+    store = HistoryStore(csv_path=None)
+    payload = publish(rebuild(store))
+    print(json.dumps(payload, indent=2))
@@ -1,99 +1,80 @@
 import pandas as pd
 import yaml
-from pathlib import Path
 from paths import eval_dir
-
-BASE = Path(__file__).resolve().parent.parent
-EVAL = eval_dir()
+import exclusion_rules
+import weighting
+from index_family import INDEX_CONFIG_FILE
 
 # -----------------------------
-# Load eligible assets
+# Flagship definition
 # -----------------------------
 
-df = pd.read_csv(EVAL / "ares_eligible_assets.csv")
+def load_flagship(path=INDEX_CONFIG_FILE):
+    # config/index.yaml "index:" (size, weighting, ...)
+    cfg = yaml.safe_load(path.read_text()) or {}
+    return weighting.validate(cfg["index"])
+
 
 # -----------------------------
-# Load exclusion rules
+# Apply exclusions
 # -----------------------------
 
-auto = yaml.safe_load(open(BASE / "ares/exclusions/exclusions.yaml")) or {}
-black = yaml.safe_load(open(BASE / "ares/exclusions/human_override.yaml")) or {}
+def apply_exclusions(df):
+    # Compiled rules (exclusion_rules.py) → (kept, excluded + rule)
+    return exclusion_rules.split(df)
 
-exclude = set(sum(auto.values(), []))
-human = (
-    set(x["symbol"] for x in black.get("blacklist", []))
-    if isinstance(black.get("blacklist"), list)
-    else set()
-)
 
 # -----------------------------
-# Apply exclusions
+# Rank by market cap + weights
 # -----------------------------
 
-mask = (
-    ~df["symbol"].str.lower().isin(exclude)
-    & ~df["symbol"].isin(human)
-)
+def rank_and_weight(filtered, flagship):
+    order = weighting.top_k(filtered["market_cap"].to_numpy(dtype=float), flagship["size"])
+    ranked = filtered.iloc[order].reset_index(drop=True)
 
-filtered = df[mask].copy()
+    if len(ranked) < flagship["size"]:
+        raise RuntimeError(f"Only {len(ranked)} eligible assets for size {flagship['size']}")
 
-filtered.to_csv(EVAL / "post_exclusion_assets.csv", index=False)
-print("Exclusions applied")
-print("Eligible assets after exclusions:", len(filtered))
+    ranked["rank"] = ranked.index + 1
+    ranked["weight"] = weighting.weights(ranked["market_cap"], flagship)
 
-# -----------------------------
-# Rank by market cap
-# -----------------------------
+    # -----------------------------
+    # Final Top 10 portfolio
+    # -----------------------------
 
-ranked = (
-    filtered
-    .sort_values("market_cap", ascending=False)
-    .head(10)
-    .reset_index(drop=True)
-)
+    top10 = ranked[["symbol", "market_cap", "rank", "weight", "asset_id"]].rename(
+        columns={"market_cap": "entry_market_cap"}
+    )
 
-ranked["rank"] = ranked.index + 1
+    weight_sum = round(top10["weight"].sum(), 6)
+    if weight_sum != 1.0:
+        raise RuntimeError(f"Weights do not sum to 1.0 (sum={weight_sum})")
 
-# -----------------------------
-# Fixed rank-based weights
-# -----------------------------
+    return top10
 
-RANK_WEIGHTS = {
-    1: 0.30,
-    2: 0.22,
-    3: 0.06,
-    4: 0.06,
-    5: 0.06,
-    6: 0.06,
-    7: 0.06,
-    8: 0.06,
-    9: 0.06,
-    10: 0.06,
-}
 
-ranked["weight"] = ranked["rank"].map(RANK_WEIGHTS)
+def print_portfolio(top10):
+    print("\nTop 10 index portfolio created:")
+    for _, r in top10.iterrows():
+        print(
+            f"Rank {r['rank']} | {r['symbol']} | "
+            f"weight={r['weight']} | "
+            f"entry_market_cap={int(r['entry_market_cap'])}"
+        )
 
-if ranked["weight"].isnull().any():
-    raise RuntimeError("Weight mapping failed for one or more ranks")
 
-# -----------------------------
-# Final Top 10 portfolio
-# -----------------------------
+if __name__ == "__main__":
+    EVAL = eval_dir()
 
-top10 = ranked[["symbol", "market_cap", "rank", "weight"]].rename(
-    columns={"market_cap": "entry_market_cap"}
-)
+    df = pd.read_csv(EVAL / "ares_eligible_assets.csv")
 
-weight_sum = round(top10["weight"].sum(), 6)
-if weight_sum != 1.0:
-    raise RuntimeError(f"Weights do not sum to 1.0 (sum={weight_sum})")
+    filtered, excluded = apply_exclusions(df)
+    filtered.to_csv(EVAL / "post_exclusion_assets.csv", index=False)
+    excluded.to_csv(EVAL / "excluded_assets.csv", index=False)
+    print("Exclusions applied")
+    print("Eligible assets after exclusions:", len(filtered))
 
-top10.to_csv(EVAL / "top10.csv", index=False)
+    top10 = rank_and_weight(filtered, load_flagship())
+    top10.to_csv(EVAL / "top10.csv", index=False)
 
-print("\nTop 10 index portfolio created:")
-for _, r in top10.iterrows():
-    print(
-        f"Rank {r['rank']} | {r['symbol']} | "
-        f"weight={r['weight']} | "
-        f"entry_market_cap={int(r['entry_market_cap'])}"
-    )
\ No newline at end of file
+    print_portfolio(top10)
@@ -1,18 +1,15 @@
 import pandas as pd
 import yaml
-from paths import eval_dir
+from paths import eval_dir, ENGINE_CONFIG_FILE
+from consensus import apply_quorum as apply
 
-EVAL = eval_dir()
-CFG = yaml.safe_load(open("config/engine.yaml"))
 
-df = pd.read_csv(EVAL / "symbol_presence_matrix.csv")
+if __name__ == "__main__":
+    EVAL = eval_dir()
+    CFG = yaml.safe_load(open(ENGINE_CONFIG_FILE))
 
-providers = [c for c in df.columns if c != "symbol"]
-active = len(providers)
-required = min(CFG["ares"]["quorum"], active)
+    presence = pd.read_csv(EVAL / "symbol_presence_matrix.csv")
+    df, required, active = apply(presence, CFG["ares"]["quorum"])
 
-df["providers_present"] = df[providers].sum(axis=1)
-df["passes_quorum"] = df["providers_present"] >= required
-
-df.to_csv(EVAL / "quorum_results.csv", index=False)
-print(f"Quorum applied: {required}/{active}")
\ No newline at end of file
+    df.to_csv(EVAL / "quorum_results.csv", index=False)
+    print(f"Quorum applied: {required}/{active}")
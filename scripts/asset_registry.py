@@ -0,0 +1,222 @@
+import argparse
+import csv
+import os
+import re
+import sys
+
+from paths import ASSET_IDS_FILE, SNAPSHOTS_DIR
+
+# --------------------------------------------------
+# Canonical asset identity
+#
+# Maps every provider's native id (CoinGecko id, CMC id,
+# CoinPaprika id) to one internal integer asset_id, so stages
+# join on asset_id instead of the upper-cased ticker: two
+# unrelated assets sharing a ticker stay two assets.
+#
+#   ares/asset_ids.csv   asset_id, provider, native_id,
+#                        symbol, name, slug, first_seen
+#
+# One row per (provider, native_id); an asset is all rows with
+# its asset_id. The table only grows: each rebalance adds the
+# native ids it has not seen, ids are never reassigned.
+#
+# An unseen native id joins an existing asset with the same
+# ticker that has no id from that provider yet when
+#   - a name or slug matches (case / punctuation ignored), or
+#   - its market cap is within tolerance of the asset's cap
+#     from the providers already assigned in this snapshot
+# and gets a new asset_id otherwise. Providers are assigned in
+# PROVIDER_ORDER, each largest cap first.
+#
+#   python scripts/asset_registry.py build     (from all snapshots)
+#   python scripts/asset_registry.py show BTC
+# --------------------------------------------------
+
+COLUMNS = ["asset_id", "provider", "native_id", "symbol", "name", "slug", "first_seen"]
+
+# Providers with the most descriptive slugs go first
+PROVIDER_ORDER = ["coingecko", "coinmarketcap", "coinpaprika"]
+
+DEFAULT_TOLERANCE_PERCENT = 15
+
+
+NON_ALNUM = re.compile(r"[^a-z0-9]")
+
+
+def name_key(s):
+    return NON_ALNUM.sub("", s.lower()) if isinstance(s, str) else ""
+
+
+def is_missing(x):
+    return x is None or x != x
+
+
+def provider_rank(provider):
+    return (PROVIDER_ORDER.index(provider), provider) if provider in PROVIDER_ORDER else (len(PROVIDER_ORDER), provider)
+
+
+class AssetRegistry:
+    def __init__(self, path=ASSET_IDS_FILE):
+        self.path = path
+        self.rows = []
+        self.ids = {}          # (provider, native_id) → asset_id
+        self.symbols = {}      # asset_id → canonical symbol (first seen)
+        self.by_symbol = {}    # symbol → [asset_id, ...]
+        self.keys = {}         # asset_id → name / slug keys
+        self.providers = {}    # asset_id → providers with an id
+        self.last_id = 0
+
+        if path is not None and path.exists():
+            with open(path, newline="") as f:
+                for r in csv.DictReader(f):
+                    r["asset_id"] = int(r["asset_id"])
+                    self._index(r)
+        self.added = 0
+
+    def _index(self, r):
+        aid = r["asset_id"]
+        self.rows.append(r)
+        self.ids[(r["provider"], r["native_id"])] = aid
+        self.symbols.setdefault(aid, r["symbol"])
+        same_ticker = self.by_symbol.setdefault(r["symbol"], [])
+        if aid not in same_ticker:
+            same_ticker.append(aid)
+        self.keys.setdefault(aid, set()).update(k for k in (name_key(r["name"]), name_key(r["slug"])) if k)
+        self.providers.setdefault(aid, set()).add(r["provider"])
+        self.last_id = max(self.last_id, aid)
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def next_id(self):
+        return self.last_id + 1
+
+    # --------------------------------------------------
+    # Assignment
+    # --------------------------------------------------
+
+    def match(self, provider, row, caps, tolerance):
+        candidates = [
+            aid for aid in self.by_symbol.get(row["symbol"], [])
+            if provider not in self.providers[aid]
+        ]
+        keys = {k for k in (name_key(row["name"]), name_key(row["slug"])) if k}
+        for aid in candidates:
+            if keys & self.keys[aid]:
+                return aid
+
+        cap = row["market_cap"]
+        if is_missing(cap):
+            return None
+        best, best_dev = None, tolerance
+        for aid in candidates:
+            for ref in caps.get(aid, []):
+                dev = abs(cap - ref) / ref if ref else float("inf")
+                if dev <= best_dev:
+                    best, best_dev = aid, dev
+        return best
+
+    def assign(self, normalized, run_id=None, tolerance_percent=DEFAULT_TOLERANCE_PERCENT):
+        # normalized: {provider: DataFrame[native_id, symbol, name, slug, market_cap, ...]}
+        # → same frames with an int32 asset_id column
+        import numpy as np
+
+        tolerance = tolerance_percent / 100
+        caps = {}     # asset_id → caps seen in this snapshot
+        out = {}
+
+        for provider in sorted(normalized, key=provider_rank):
+            df = normalized[provider]
+            native = df["native_id"].astype(str).tolist()
+            cap = df["market_cap"].to_numpy(dtype=float)
+
+            # Known native ids: one dict lookup per row
+            known = np.array([self.ids.get((provider, n), 0) for n in native], dtype="int32")
+
+            # Unseen ones, largest cap first
+            unseen = np.flatnonzero(known == 0)
+            unseen = unseen[np.argsort(-np.nan_to_num(cap[unseen], nan=-1), kind="stable")]
+            records = df.iloc[unseen][["symbol", "name", "slug", "market_cap"]].to_dict("records")
+            for i, row in zip(unseen.tolist(), records):
+                aid = self.ids.get((provider, native[i]))
+                if aid is None:
+                    aid = self.match(provider, row, caps, tolerance) or self.next_id()
+                    self._index({
+                        "asset_id": aid,
+                        "provider": provider,
+                        "native_id": native[i],
+                        "symbol": row["symbol"],
+                        "name": row["name"] if isinstance(row["name"], str) else "",
+                        "slug": row["slug"] if isinstance(row["slug"], str) else "",
+                        "first_seen": run_id or "",
+                    })
+                    self.added += 1
+                known[i] = aid
+
+            # An asset never matches its own provider twice, so this
+            # provider's caps only serve the providers after it
+            for aid, c in zip(known.tolist(), cap.tolist()):
+                if c == c:
+                    caps.setdefault(aid, []).append(c)
+
+            out[provider] = df.assign(asset_id=known)
+
+        return out
+
+    # --------------------------------------------------
+    # Persistence
+    # --------------------------------------------------
+
+    def save(self):
+        if not self.added:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=COLUMNS, lineterminator="\n")
+            w.writeheader()
+            w.writerows(sorted(self.rows, key=lambda r: (r["asset_id"], provider_rank(r["provider"]))))
+        os.replace(tmp, self.path)
+        self.added = 0
+
+
+def build(path=ASSET_IDS_FILE):
+    # Replay every archived snapshot, oldest first
+    import yaml
+    from paths import ENGINE_CONFIG_FILE
+    import normalize
+    import provider_registry
+
+    tolerance = yaml.safe_load(ENGINE_CONFIG_FILE.read_text())["ares"]["tolerance_percent"]
+    registry = AssetRegistry(path=None)
+    registry.path = path
+
+    providers = provider_registry.load()
+    for run_id in sorted(p.name for p in SNAPSHOTS_DIR.iterdir() if (p / "snapshot_meta.json").exists()):
+        registry.assign(normalize.normalize_all(SNAPSHOTS_DIR / run_id, providers), run_id, tolerance)
+        print(f"▶ {run_id}: {len(registry)} assets")
+
+    registry.save()
+    return registry
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("command", choices=["build", "show"])
+    ap.add_argument("symbol", nargs="?")
+    args = ap.parse_args()
+
+    if args.command == "build":
+        registry = build()
+        print(f"▶ {len(registry)} assets, {len(registry.rows)} provider ids → {ASSET_IDS_FILE}")
+    else:
+        registry = AssetRegistry()
+        symbol = (args.symbol or "").upper()
+        for aid in registry.by_symbol.get(symbol, []):
+            print(f"\n▶ asset {aid} ({symbol})")
+            for r in registry.rows:
+                if r["asset_id"] == aid:
+                    print(f"  {r['provider']:<14} {r['native_id']:<40} {r['name']}")
+        if symbol not in registry.by_symbol:
+            sys.exit(f"No asset with symbol {symbol}")
@@ -0,0 +1,279 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import yaml
+from pathlib import Path
+from datetime import datetime, timezone
+
+from paths import ENGINE_CONFIG_FILE
+import pipeline
+import index_math
+import index_family
+import apply_exclu_weight_rank
+import provider_registry
+
+# --------------------------------------------------
+# Synthetic-scale benchmark
+#
+# Generates provider payloads in the exact shapes the normalizers
+# read (CoinGecko markets list, CoinMarketCap listings envelope,
+# CoinPaprika tickers) for each universe size, then times and
+# memory-profiles every pipeline stage plus the index tick math.
+#
+#   python scripts/benchmark.py --sizes 50,1000,10000,100000 \
+#       --overlap 0.8 --noise 0.05 --out bench_report.json
+#
+# Each stage is timed over --repeat runs (best / median seconds),
+# then run once more under tracemalloc for its peak allocation.
+#
+# Interpreter startup of the tick and rebalance paths is measured
+# in fresh processes (--startup-only skips the size sweep).
+# --------------------------------------------------
+
+DEFAULT_SIZES = [50, 1_000, 10_000, 100_000]
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+STARTUP_PROBES = {
+    "interpreter": "pass",
+    "tick_path": "import index_runner",
+    "rebalance_path": "import pipeline",
+}
+
+
+# --------------------------------------------------
+# Synthetic payloads
+# --------------------------------------------------
+
+def synthetic_universe(n, overlap, rng):
+    # A shared core of round(n * overlap) assets every provider lists,
+    # plus a per-provider tail drawn from a wider pool
+    pool = int(n * (2 - overlap)) + 1
+    caps = np.sort(rng.lognormal(mean=20, sigma=2.5, size=pool))[::-1]
+    symbols = [f"S{i:06d}" for i in range(pool)]
+    return symbols, caps
+
+
+def provider_listing(n, overlap, symbols, caps, noise, rng):
+    core = int(round(n * overlap))
+    tail = rng.choice(np.arange(core, len(symbols)), size=n - core, replace=False)
+    idx = np.concatenate([np.arange(core), tail])
+    quoted = caps[idx] * rng.normal(1.0, noise, size=len(idx)).clip(0.5, 1.5)
+    return [(symbols[i], float(c)) for i, c in zip(idx, quoted)]
+
+
+def coingecko_payload(listing):
+    return [
+        {
+            "id": sym.lower(),
+            "symbol": sym.lower(),
+            "name": sym,
+            "current_price": 1.0,
+            "market_cap": round(cap),
+            "market_cap_rank": rank,
+        }
+        for rank, (sym, cap) in enumerate(listing, 1)
+    ]
+
+
+def coinmarketcap_payload(listing):
+    return {
+        "status": {"error_code": 0, "total_count": len(listing)},
+        "data": [
+            {
+                "id": i,
+                "name": sym,
+                "symbol": sym,
+                "slug": sym.lower(),
+                "cmc_rank": i,
+                "quote": {"USD": {"price": 1.0, "market_cap": cap}},
+            }
+            for i, (sym, cap) in enumerate(listing, 1)
+        ],
+    }
+
+
+def coinpaprika_payload(listing):
+    return [
+        {
+            "id": f"{sym.lower()}-{sym.lower()}",
+            "name": sym,
+            "symbol": sym,
+            "rank": rank,
+            "quotes": {"USD": {"price": 1.0, "market_cap": round(cap)}},
+        }
+        for rank, (sym, cap) in enumerate(listing, 1)
+    ]
+
+
+def write_snapshot(snap, n, overlap, noise, seed):
+    rng = np.random.default_rng(seed)
+    symbols, caps = synthetic_universe(n, overlap, rng)
+
+    payloads = {
+        "coingecko": coingecko_payload,
+        "coinmarketcap": coinmarketcap_payload,
+        "coinpaprika": coinpaprika_payload,
+    }
+    sizes = {}
+    for name, build in payloads.items():
+        listing = provider_listing(n, overlap, symbols, caps, noise, rng)
+        path = snap / f"{name}.json"
+        with open(path, "w") as f:
+            json.dump(build(listing), f)
+        sizes[name] = path.stat().st_size
+    return sizes
+
+
+# --------------------------------------------------
+# Measurement
+# --------------------------------------------------
+
+def measure(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return result, {
+        "seconds_best": min(times),
+        "seconds_median": statistics.median(times),
+        "peak_alloc_bytes": peak,
+    }
+
+
+def bench_size(n, args, cfg):
+    with tempfile.TemporaryDirectory() as tmp:
+        snap = Path(tmp)
+        payload_bytes = write_snapshot(snap, n, args.overlap, args.noise, args.seed)
+
+        # CoinPaprika keeps the top-N of its full universe: scale with n
+        providers = provider_registry.load()
+        providers["coinpaprika"] = dict(providers["coinpaprika"], top_n=n)
+
+        run = {
+            "run_id": f"bench-{n}",
+            "snap": snap,
+            "eval": None,
+            "cfg": cfg,
+            "providers": providers,
+            "flagship": apply_exclu_weight_rank.load_flagship(),
+            "indices": index_family.load_definitions(),
+        }
+        frames = {}
+        results = []
+
+        for name, stage, _ in pipeline.STAGES:
+            produced, stats = measure(lambda: stage(dict(frames), run), args.repeat)
+            frames.update(produced)
+            results.append({
+                "assets": n,
+                "stage": name,
+                **stats,
+                "rows_out": {k: len(v) for k, v in produced.items()},
+            })
+
+        # Index tick over n constituents (the live index uses 10)
+        rows = frames["coinpaprika_normalized"].assign(weight=1.0 / n).to_dict("records")
+
+        def tick():
+            raw = index_math.raw_value(rows)
+            index_math.index_value(raw, raw / 1000.0)
+            return index_math.constituents_payload(rows[:10], "bench")
+
+        _, stats = measure(tick, args.repeat)
+        results.append({"assets": n, "stage": "index_tick", **stats, "rows_out": {"constituents": len(rows)}})
+
+    return results, payload_bytes
+
+
+def bench_startup(repeat):
+    results = []
+    for probe, code in STARTUP_PROBES.items():
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, "-c", code], cwd=SCRIPTS_DIR, check=True)
+            times.append(time.perf_counter() - start)
+        results.append({
+            "probe": probe,
+            "code": code,
+            "seconds_best": min(times),
+            "seconds_median": statistics.median(times),
+        })
+    return results
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    ap.add_argument("--overlap", type=float, default=0.8, help="share of assets all providers list")
+    ap.add_argument("--noise", type=float, default=0.05, help="relative market-cap noise per provider")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--out", default="bench_report.json")
+    ap.add_argument("--startup-only", action="store_true", help="only measure interpreter startup")
+    args = ap.parse_args()
+
+    cfg = yaml.safe_load(ENGINE_CONFIG_FILE.read_text())
+    sizes = [] if args.startup_only else [int(s) for s in args.sizes.split(",")]
+
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {
+            "sizes": sizes,
+            "overlap": args.overlap,
+            "noise": args.noise,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "payload_bytes": {},
+        "results": [],
+    }
+
+    print("▶ Benchmarking interpreter startup...")
+    report["startup"] = bench_startup(max(args.repeat, 5))
+    for r in report["startup"]:
+        print(f"  {r['probe']:<26} {r['seconds_best'] * 1000:10.1f} ms  ({r['code']})")
+
+    for n in sizes:
+        print(f"▶ Benchmarking {n} assets...")
+        # Silence the pipeline's own progress output
+        with contextlib.redirect_stdout(io.StringIO()):
+            results, payload_bytes = bench_size(n, args, cfg)
+        report["payload_bytes"][str(n)] = payload_bytes
+        report["results"].extend(results)
+
+        for r in results:
+            print(
+                f"  {r['stage']:<26} {r['seconds_best'] * 1000:10.1f} ms"
+                f"  peak {r['peak_alloc_bytes'] / 1e6:8.2f} MB"
+            )
+
+    report["max_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Report written:", args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,25 @@
 import pandas as pd
 from paths import eval_dir
+from consensus import market_cap_matrix, presence_matrix, asset_symbols
 
-EVAL = eval_dir()
-files = list(EVAL.glob("*_normalized.csv"))
 
-dfs = []
-for f in files:
-    provider = f.stem.replace("_normalized", "")
-    df = pd.read_csv(f)[["symbol"]].drop_duplicates()
-    df[provider] = 1
-    dfs.append(df)
+def build(normalized):
+    # normalized: {provider: normalized DataFrame with asset_id}
+    matrix, present = market_cap_matrix(normalized)
+    return presence_matrix(present, asset_symbols(normalized, matrix.index))
 
-out = dfs[0]
-for df in dfs[1:]:
-    out = out.merge(df, on="symbol", how="outer")
 
-out.fillna(0, inplace=True)
-out.to_csv(EVAL / "symbol_presence_matrix.csv", index=False)
+def load_normalized(eval_path):
+    return {
+        f.stem.replace("_normalized", ""): pd.read_csv(f)
+        for f in eval_path.glob("*_normalized.csv")
+    }
 
-print("Presence matrix built")
+
+if __name__ == "__main__":
+    EVAL = eval_dir()
+
+    out = build(load_normalized(EVAL))
+    out.to_csv(EVAL / "symbol_presence_matrix.csv", index=False)
+
+    print("Presence matrix built")
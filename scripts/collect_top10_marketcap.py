@@ -1,32 +1,87 @@
-import requests
-import pandas as pd
+import io
+import os
+import csv
+import json
+import time
 from pathlib import Path
-from datetime import datetime, timezone
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+from datetime import datetime, timezone, timedelta
+
+import tick_log
 
 # --------------------------------------------------
 # Paths
 # --------------------------------------------------
 
 BASE = Path(__file__).resolve().parent.parent
-RUN_ID = (BASE / "CURRENT_RUN.txt").read_text().strip()
-
-TOP10 = BASE / "ares_eval" / RUN_ID / "top10.csv"
 
 OUT_DIR = BASE / "index_data"
-OUT_DIR.mkdir(exist_ok=True)
 
 OUT_FILE = OUT_DIR / "latest_marketcaps.csv"
 
+# Symbol → CoinGecko id resolution cache
+#   coingecko_ids.json        ids pinned for the constituents of one run
+#   coingecko_coin_list.json  /coins/list (symbol → ids), refreshed on TTL or miss
+PINNED_IDS_FILE = OUT_DIR / "coingecko_ids.json"
+COIN_LIST_FILE = OUT_DIR / "coingecko_coin_list.json"
+COIN_LIST_TTL = timedelta(days=7)
+
+# COINGECKO_API_URL points at a local stand-in (see stub_provider_server.py)
+API = os.environ.get("COINGECKO_API_URL", "https://api.coingecko.com/api/v3").rstrip("/")
+
+
+def current_run_id():
+    return (BASE / "CURRENT_RUN.txt").read_text().strip()
+
+
+def top10_path(run_id=None):
+    return BASE / "ares_eval" / (run_id or current_run_id()) / "top10.csv"
+
+
+def read_top10(run_id=None):
+    with open(top10_path(run_id), newline="") as f:
+        return list(csv.DictReader(f))
+
 
 # --------------------------------------------------
 # Helper
+#
+# This module is on the 30-minute tick path: stdlib only
+# (urllib / csv), no requests or pandas import per tick.
 # --------------------------------------------------
 
+# Latency / size of every CoinGecko request made by this process
+# (picked up by the run manifest)
+REQUEST_LOG = []
+
+HEADERS = {"Accept": "application/json", "User-Agent": "ares-index"}
+
+
+def http_get(url, params=None, timeout=30):
+    if params:
+        url = f"{url}?{urlencode(params)}"
+    try:
+        with urlopen(Request(url, headers=HEADERS), timeout=timeout) as r:
+            return r.status, r.read()
+    except HTTPError as e:
+        return e.code, e.read()
+
+
 def safe_get_json(url, params=None, timeout=30):
     try:
-        r = requests.get(url, params=params, timeout=timeout)
-        r.raise_for_status()
-        data = r.json()
+        start = time.perf_counter()
+        status, body = http_get(url, params, timeout)
+        REQUEST_LOG.append({
+            "url": url,
+            "status_code": status,
+            "latency_ms": round((time.perf_counter() - start) * 1000, 1),
+            "bytes": len(body),
+        })
+        if status >= 400:
+            raise RuntimeError(f"HTTP {status} for url: {url}")
+        data = json.loads(body)
         if not isinstance(data, list):
             raise ValueError("Unexpected JSON structure")
         return data
@@ -34,113 +89,224 @@ def safe_get_json(url, params=None, timeout=30):
         raise RuntimeError(f"CoinGecko fetch failed: {e}")
 
 
+def fetch_market_caps(ids):
+    market_data = safe_get_json(
+        f"{API}/coins/markets",
+        params={
+            "vs_currency": "usd",
+            "ids": ",".join(sorted(ids)),
+            "per_page": 250,
+            "page": 1
+        }
+    )
+
+    if not market_data:
+        raise RuntimeError("No market data returned from CoinGecko")
+
+    return {
+        c["id"]: c["market_cap"]
+        for c in market_data
+        if c.get("market_cap") is not None
+    }
+
+
 # --------------------------------------------------
-# Load top10 portfolio
+# Coin list cache
 # --------------------------------------------------
 
-df = pd.read_csv(TOP10)
+def load_coin_list(force=False):
+    if COIN_LIST_FILE.exists() and not force:
+        with open(COIN_LIST_FILE) as f:
+            cached = json.load(f)
+        fetched_at = datetime.fromisoformat(cached["fetched_at"])
+        if datetime.now(timezone.utc) - fetched_at < COIN_LIST_TTL:
+            return cached["symbol_to_ids"]
+
+    print("Loading CoinGecko coin list...")
+    coin_list = safe_get_json(f"{API}/coins/list")
+
+    symbol_to_ids = {}
+    for coin in coin_list:
+        symbol_to_ids.setdefault(coin["symbol"].lower(), []).append(coin["id"])
+
+    with open(COIN_LIST_FILE, "w") as f:
+        json.dump(
+            {
+                "fetched_at": datetime.now(timezone.utc).isoformat(),
+                "symbol_to_ids": symbol_to_ids,
+            },
+            f,
+            separators=(",", ":"),
+        )
+
+    return symbol_to_ids
 
-symbols = df["symbol"].str.lower().tolist()
 
 # --------------------------------------------------
-# Load CoinGecko coin list
+# Pinned ids
 # --------------------------------------------------
 
-print("Loading CoinGecko coin list...")
-coin_list = safe_get_json(
-    "https://api.coingecko.com/api/v3/coins/list"
-)
+def load_pins(run_id):
+    if not PINNED_IDS_FILE.exists():
+        return {}
+    with open(PINNED_IDS_FILE) as f:
+        pins = json.load(f)
+    # Pins belong to one portfolio; a new rebalance starts fresh
+    return pins["ids"] if pins.get("run_id") == run_id else {}
 
-symbol_to_ids = {}
-for coin in coin_list:
-    symbol_to_ids.setdefault(coin["symbol"].lower(), []).append(coin["id"])
 
-# --------------------------------------------------
-# Collect ALL candidate IDs
-# --------------------------------------------------
+def save_pins(run_id, ids):
+    # Ticks and a rebalance may both resolve ids: replace, never tear
+    tick_log.write_atomic(PINNED_IDS_FILE, json.dumps({"run_id": run_id, "ids": ids}, indent=2))
 
-all_candidate_ids = set()
 
-for sym in symbols:
-    ids = symbol_to_ids.get(sym)
-    if not ids:
-        raise RuntimeError(f"No CoinGecko IDs found for symbol: {sym}")
-    all_candidate_ids.update(ids)
+def resolve_ids(symbols):
+    # Map each symbol to the candidate id with the highest market cap.
+    # Returns the pins plus the caps fetched while resolving them;
+    # symbols that cannot be resolved get no pin.
+    symbol_to_ids = load_coin_list()
+    if any(sym.lower() not in symbol_to_ids for sym in symbols):
+        symbol_to_ids = load_coin_list(force=True)
 
-print(f"Fetching market data for {len(all_candidate_ids)} candidate IDs...")
+    # --------------------------------------------------
+    # Collect ALL candidate IDs
+    # --------------------------------------------------
 
-# --------------------------------------------------
-# Fetch market caps
-# --------------------------------------------------
+    all_candidate_ids = set()
 
-market_data = safe_get_json(
-    "https://api.coingecko.com/api/v3/coins/markets",
-    params={
-        "vs_currency": "usd",
-        "ids": ",".join(all_candidate_ids),
-        "per_page": 250,
-        "page": 1
-    }
-)
+    for sym in symbols:
+        ids = symbol_to_ids.get(sym.lower())
+        if not ids:
+            print(f"⚠ No CoinGecko IDs found for symbol: {sym.lower()}")
+            continue
+        all_candidate_ids.update(ids)
 
-if not market_data:
-    raise RuntimeError("No market data returned from CoinGecko")
+    if not all_candidate_ids:
+        return {}, {}
 
-# Build ID → market_cap map
+    print(f"Fetching market data for {len(all_candidate_ids)} candidate IDs...")
+    id_to_cap = fetch_market_caps(all_candidate_ids)
+
+    # --------------------------------------------------
+    # Resolve best ID per symbol
+    # --------------------------------------------------
+
+    pins = {}
+
+    for sym in symbols:
+        best_id = None
+        best_cap = None
+
+        for cid in symbol_to_ids.get(sym.lower(), []):
+            cap = id_to_cap.get(cid)
+            if cap is None:
+                continue
+
+            # Choose the candidate with the highest market cap
+            if best_cap is None or cap > best_cap:
+                best_cap = cap
+                best_id = cid
+
+        if best_id is not None:
+            pins[sym] = best_id
+
+    return pins, id_to_cap
 
-id_to_cap = {
-    c["id"]: c["market_cap"]
-    for c in market_data
-    if c.get("market_cap") is not None
-}
 
 # --------------------------------------------------
-# Resolve best ID per symbol
+# Collect
 # --------------------------------------------------
 
-rows = []
+def market_caps(symbols, run_id=None, required=None):
+    # {symbol: market cap}; symbols may span several indices.
+    # Raises if a required symbol (default: all) cannot be priced;
+    # the others are left out of the result.
+    run_id = run_id or current_run_id()
+    symbols = list(dict.fromkeys(symbols))
+    OUT_DIR.mkdir(exist_ok=True)
 
-for _, row in df.iterrows():
-    sym = row["symbol"].lower()
-    candidates = symbol_to_ids[sym]
+    pins = load_pins(run_id)
+    id_to_cap = {}
 
-    best_id = None
-    best_cap = None
+    missing = [s for s in symbols if s not in pins]
+    if missing:
+        resolved, id_to_cap = resolve_ids(missing)
+        pins.update(resolved)
+        save_pins(run_id, pins)
 
-    for cid in candidates:
-        cap = id_to_cap.get(cid)
-        if cap is None:
-            continue
+    # Steady state: one markets request for exactly the pinned ids
+    unpriced = {pins[s] for s in symbols if s in pins and pins[s] not in id_to_cap}
+    if unpriced:
+        id_to_cap.update(fetch_market_caps(unpriced))
 
-        # Choose the candidate with the highest market cap
-        if best_cap is None or cap > best_cap:
-            best_cap = cap
-            best_id = cid
+    # A pinned id that stopped returning a cap (delisted / migrated)
+    # is re-resolved once against a fresh coin list
+    stale = [s for s in symbols if s in pins and pins[s] not in id_to_cap]
+    if stale:
+        load_coin_list(force=True)
+        resolved, caps = resolve_ids(stale)
+        pins.update(resolved)
+        id_to_cap.update(caps)
+        save_pins(run_id, pins)
 
-    if best_id is None:
-        raise RuntimeError(
-            f"Failed to resolve market cap for {row['symbol']}"
-        )
+    caps = {s: id_to_cap[pins[s]] for s in symbols if s in pins and pins[s] in id_to_cap}
 
-    rows.append({
-        "symbol": row["symbol"],
-        "rank": row["rank"],
-        "weight": row["weight"],
-        "entry_market_cap": row["entry_market_cap"],
-        "market_cap": best_cap
-    })
+    failed = [s for s in symbols if s not in caps]
+    required = set(symbols if required is None else required)
+    if any(s in required for s in failed):
+        raise RuntimeError(f"Failed to resolve market cap for {', '.join(s for s in failed if s in required)}")
+    if failed:
+        print(f"⚠ No market cap for {', '.join(failed)}")
+
+    return caps
 
-# --------------------------------------------------
-# Output
-# --------------------------------------------------
 
-out = pd.DataFrame(rows)
-out["timestamp_utc"] = datetime.now(timezone.utc).isoformat()
+def collect(top10, run_id=None, caps=None):
+    # top10: rows (mappings) of ares_eval/<run_id>/top10.csv;
+    # caps: market_caps() already fetched for a superset of them
+    if caps is None:
+        caps = market_caps([row["symbol"] for row in top10], run_id)
 
-out.to_csv(OUT_FILE, index=False)
+    timestamp = datetime.now(timezone.utc).isoformat()
+    rows = []
 
-print("\nMarket caps collected successfully:")
-for _, r in out.iterrows():
-    print(f"{r['symbol']}  market_cap={int(r['market_cap'])}")
+    for row in top10:
+        rows.append({
+            "symbol": row["symbol"],
+            "rank": row["rank"],
+            "weight": row["weight"],
+            "entry_market_cap": row["entry_market_cap"],
+            "market_cap": caps[row["symbol"]],
+            "timestamp_utc": timestamp
+        })
+
+    return rows
+
+
+OUT_COLUMNS = ["symbol", "rank", "weight", "entry_market_cap", "market_cap", "timestamp_utc"]
+
+
+def write(rows, quiet=False, path=OUT_FILE):
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=OUT_COLUMNS, lineterminator="\n")
+    writer.writeheader()
+    writer.writerows(rows)
+    tick_log.write_atomic(path, buf.getvalue())
+
+    if quiet:
+        return
+
+    print("\nMarket caps collected successfully:")
+    for r in rows:
+        print(f"{r['symbol']}  market_cap={int(r['market_cap'])}")
+
+    print(f"\nSaved to: {path}")
+
+
+# --------------------------------------------------
+# Output
+# --------------------------------------------------
 
-print(f"\nSaved to: {OUT_FILE}")
+if __name__ == "__main__":
+    run_id = current_run_id()
+    write(collect(read_top10(run_id), run_id))
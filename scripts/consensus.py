@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# --------------------------------------------------
+# ARES consensus engine
+#
+# Builds one asset × provider market-cap matrix from the
+# normalized provider frames and derives presence, quorum,
+# median and tolerance from it as column operations:
+#
+#   symbol_presence_matrix  asset_id, symbol, <provider>... (1.0 / 0.0)
+#   quorum_results          + providers_present, passes_quorum
+#   ares_eligible_assets    asset_id, symbol, market_cap (consensus median)
+#
+# Rows are canonical assets (asset_registry.py): providers are
+# joined on the int32 asset_id, never on the ticker.
+# --------------------------------------------------
+
+KEYS = ["asset_id", "symbol"]
+
+
+def market_cap_matrix(normalized):
+    # normalized: {provider: DataFrame[asset_id, symbol, market_cap]}
+    # Rows are the sorted union of asset ids, columns the sorted
+    # providers; a provider listing an asset twice keeps its last row.
+    caps = {
+        provider: normalized[provider]
+        .drop_duplicates("asset_id", keep="last")
+        .set_index("asset_id")["market_cap"]
+        for provider in sorted(normalized)
+    }
+
+    matrix = pd.concat(caps, axis=1, sort=True).astype(float)
+
+    # Presence is about the asset being listed, not about the cap
+    present = pd.DataFrame(
+        {provider: matrix.index.isin(s.index) for provider, s in caps.items()},
+        index=matrix.index,
+    )
+    return matrix, present
+
+
+def asset_symbols(normalized, index):
+    # Display ticker per asset: the first provider's (sorted) listing
+    listed = pd.concat(
+        [normalized[p].set_index("asset_id")["symbol"] for p in sorted(normalized)]
+    )
+    listed = listed[~listed.index.duplicated()]
+    return listed.reindex(index).astype("category")
+
+
+def presence_matrix(present, symbols):
+    out = present.astype(float)
+    out.insert(0, "symbol", symbols)
+    out.index.name = "asset_id"
+    return out.reset_index()
+
+
+def apply_quorum(presence, quorum):
+    df = presence.copy()
+
+    providers = [c for c in df.columns if c not in KEYS]
+    active = len(providers)
+    required = min(quorum, active)
+
+    df["providers_present"] = df[providers].sum(axis=1)
+    df["passes_quorum"] = df["providers_present"] >= required
+
+    return df, required, active
+
+
+def consensus_caps(matrix, tolerance_percent):
+    # Upper median per symbol (sorted(caps)[n // 2]) and the number of
+    # providers within tolerance of it
+    values = matrix.to_numpy()
+    counts = np.count_nonzero(~np.isnan(values), axis=1)
+
+    ordered = np.sort(values, axis=1)  # NaN sorts last
+    pick = np.minimum(counts // 2, values.shape[1] - 1)
+    base = ordered[np.arange(len(values)), pick]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        deviation = np.abs(values - base[:, None]) / base[:, None]
+    within = np.count_nonzero(deviation <= tolerance_percent / 100, axis=1)
+
+    return base, counts, within
+
+
+def apply_tolerance(quorum_results, matrix, tolerance_percent, quorum):
+    base, counts, within = consensus_caps(matrix, tolerance_percent)
+
+    indexed = quorum_results.set_index("asset_id").reindex(matrix.index)
+    passes = indexed["passes_quorum"].fillna(False).to_numpy(dtype=bool)
+    keep = passes & (counts >= 2) & (within >= quorum)
+
+    df = pd.DataFrame({
+        "asset_id": matrix.index[keep],
+        "symbol": indexed["symbol"].to_numpy()[keep],
+        "market_cap": base[keep],
+    })
+    return df.sort_values("market_cap", ascending=False)
+
+
+def run(normalized, quorum, tolerance_percent):
+    matrix, present = market_cap_matrix(normalized)
+
+    presence = presence_matrix(present, asset_symbols(normalized, matrix.index))
+    quorum_results, required, active = apply_quorum(presence, quorum)
+    eligible = apply_tolerance(quorum_results, matrix, tolerance_percent, quorum)
+
+    print(f"Quorum applied: {required}/{active}")
+    print("Validated assets:", len(eligible))
+
+    return {
+        "symbol_presence_matrix": presence,
+        "quorum_results": quorum_results,
+        "ares_eligible_assets": eligible,
+    }
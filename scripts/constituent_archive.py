@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+from array import array
+from pathlib import Path
+from datetime import datetime, timezone
+
+from history_store import to_micros
+
+# --------------------------------------------------
+# Tick-level constituent archive
+#
+# Every tick's constituent rows, partitioned by UTC day:
+#
+#   index_data/constituents/<YYYY-MM-DD>/
+#     time.i64         int64   timestamp (µs since epoch, UTC)
+#     symbol.u32       uint32  code into dict.json "symbols"
+#     run.u32          uint32  code into dict.json "runs"
+#     weight.f64       float64
+#     market_cap.f64   float64
+#     dict.json        append-only symbol / run_id dictionaries
+#
+# Columns are raw little-endian arrays, one element per row,
+# appended in time order: a day is memory-mapped by numpy and
+# scanned with a bisect on time plus a vectorized symbol filter.
+# A torn append (crash mid-tick) is cut back to the shortest
+# column. Appends are stdlib only (tick path).
+#
+#   python scripts/constituent_archive.py --symbol BTC \
+#       --from 2026-03-01 --to 2026-03-08 --out /tmp/btc.csv
+# --------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+ARCHIVE_DIR = BASE_DIR / "index_data" / "constituents"
+
+# column → (array typecode, numpy dtype)
+COLUMNS = {
+    "time": ("q", "<i8"),
+    "symbol": ("I", "<u4"),
+    "run": ("I", "<u4"),
+    "weight": ("d", "<f8"),
+    "market_cap": ("d", "<f8"),
+}
+SUFFIX = {"q": "i64", "I": "u32", "d": "f64"}
+DICT_FILE = "dict.json"
+
+
+def column_file(part, name):
+    return part / f"{name}.{SUFFIX[COLUMNS[name][0]]}"
+
+
+def partition_name(us):
+    return datetime.fromtimestamp(us / 1e6, timezone.utc).strftime("%Y-%m-%d")
+
+
+def load_dict(part):
+    path = part / DICT_FILE
+    if not path.exists():
+        return {"symbols": [], "runs": []}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_dict(part, d):
+    tmp = part / f"{DICT_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(d, f, separators=(",", ":"))
+    os.replace(tmp, part / DICT_FILE)
+
+
+def row_count(part):
+    itemsize = {name: array(code).itemsize for name, (code, _) in COLUMNS.items()}
+    return min(
+        (column_file(part, name).stat().st_size // itemsize[name]
+         if column_file(part, name).exists() else 0)
+        for name in COLUMNS
+    )
+
+
+class ConstituentArchive:
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = Path(root)
+
+    # --------------------------------------------------
+    # Writes
+    # --------------------------------------------------
+
+    def append(self, timestamp, rows, run_id):
+        us = to_micros(timestamp)
+        part = self.root / partition_name(us)
+        part.mkdir(parents=True, exist_ok=True)
+
+        # Dictionary first, so every code on disk resolves
+        d = load_dict(part)
+        codes = {s: i for i, s in enumerate(d["symbols"])}
+        runs = {r: i for i, r in enumerate(d["runs"])}
+        new_symbols = [r["symbol"] for r in rows if r["symbol"] not in codes]
+        if new_symbols or run_id not in runs:
+            for s in dict.fromkeys(new_symbols):
+                codes[s] = len(d["symbols"])
+                d["symbols"].append(s)
+            if run_id not in runs:
+                runs[run_id] = len(d["runs"])
+                d["runs"].append(run_id)
+            save_dict(part, d)
+
+        values = {
+            "time": [us] * len(rows),
+            "symbol": [codes[r["symbol"]] for r in rows],
+            "run": [runs[run_id]] * len(rows),
+            "weight": [float(r["weight"]) for r in rows],
+            "market_cap": [float(r["market_cap"]) for r in rows],
+        }
+
+        # Drop a torn tail from an interrupted append before adding
+        n = row_count(part)
+        for name, (code, _) in COLUMNS.items():
+            path = column_file(part, name)
+            with open(path, "ab") as f:
+                end = n * array(code).itemsize
+                if f.tell() != end:
+                    f.truncate(end)
+                f.write(array(code, values[name]).tobytes())
+
+    # --------------------------------------------------
+    # Reads
+    # --------------------------------------------------
+
+    def partitions(self, start=None, end=None):
+        if not self.root.exists():
+            return []
+        parts = sorted(p for p in self.root.iterdir() if p.is_dir())
+        if start is not None:
+            first = partition_name(to_micros(start))
+            parts = [p for p in parts if p.name >= first]
+        if end is not None:
+            last = partition_name(to_micros(end))
+            parts = [p for p in parts if p.name <= last]
+        return parts
+
+    def scan(self, symbols=None, start=None, end=None):
+        # Rows with start <= timestamp < end, optionally for some symbols
+        import numpy as np
+        import pandas as pd
+
+        lo_us = None if start is None else to_micros(start)
+        hi_us = None if end is None else to_micros(end)
+        wanted = None if symbols is None else set(symbols)
+        frames = []
+
+        for part in self.partitions(start, end):
+            n = row_count(part)
+            if n == 0:
+                continue
+
+            cols = {
+                name: np.memmap(column_file(part, name), dtype=dtype, mode="r", shape=(n,))
+                for name, (_, dtype) in COLUMNS.items()
+            }
+            lo = 0 if lo_us is None else int(np.searchsorted(cols["time"], lo_us, "left"))
+            hi = n if hi_us is None else int(np.searchsorted(cols["time"], hi_us, "left"))
+            if lo >= hi:
+                continue
+
+            d = load_dict(part)
+            sel = slice(lo, hi)
+            mask = np.ones(hi - lo, dtype=bool)
+            if wanted is not None:
+                codes = [i for i, s in enumerate(d["symbols"]) if s in wanted]
+                mask = np.isin(cols["symbol"][sel], codes)
+
+            frames.append(pd.DataFrame({
+                "timestamp_utc": pd.to_datetime(cols["time"][sel][mask], unit="us", utc=True),
+                "symbol": np.asarray(d["symbols"], dtype=object)[cols["symbol"][sel][mask]],
+                "weight": np.array(cols["weight"][sel][mask]),
+                "market_cap": np.array(cols["market_cap"][sel][mask]),
+                "run_id": np.asarray(d["runs"], dtype=object)[cols["run"][sel][mask]],
+            }))
+
+        if not frames:
+            return pd.DataFrame(columns=["timestamp_utc", "symbol", "weight", "market_cap", "run_id"])
+        return pd.concat(frames, ignore_index=True)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--symbol", action="append", help="repeatable; default all")
+    ap.add_argument("--from", dest="start", help="ISO date/time (inclusive)")
+    ap.add_argument("--to", dest="end", help="ISO date/time (exclusive)")
+    ap.add_argument("--out", help="write CSV here instead of printing")
+    args = ap.parse_args()
+
+    def bound(s):
+        if s is None:
+            return None
+        t = datetime.fromisoformat(s)
+        return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+    df = ConstituentArchive().scan(args.symbol, bound(args.start), bound(args.end))
+
+    if args.out:
+        df.to_csv(args.out, index=False)
+        print(f"▶ {len(df)} rows → {args.out}")
+    else:
+        print(df.to_string(index=False))
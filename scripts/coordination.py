@@ -0,0 +1,115 @@
+import fcntl
+import json
+import os
+import socket
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime, timezone
+
+import tick_log
+
+# --------------------------------------------------
+# Coordination between index ticks, rebalances and
+# emergency adjustments
+#
+# Leases: OS file locks (flock) under index_data/locks/. The
+# kernel drops a lock when its holder dies, so a crashed job
+# never leaves a stale lock; the holder's pid / purpose / time
+# are written into the lock file for diagnosis. Acquisition
+# gives up after a timeout (LeaseTimeout) instead of waiting
+# forever.
+#
+#   "index"   held by a tick from its state check to its commit,
+#             and by a rebalance while it swaps the state pointer
+#             (milliseconds: neither job waits on the network of
+#             the other)
+#
+# State pointer: index_data/index_state.json holds the run_id
+# whose constituents are live, the divisor that goes with them
+# and a version number. It is only ever replaced whole (atomic
+# rename), so a tick reads one consistent (run_id, divisor)
+# pair; ares_eval/<run_id>/ is immutable once published. A
+# rebalance prepares its new run next to the live one and flips
+# the pointer at the end; ticks keep running against the
+# previous version until then.
+# --------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "index_data"
+LOCKS_DIR = DATA_DIR / "locks"
+STATE_FILE = DATA_DIR / "index_state.json"
+
+LEASE_TIMEOUT = 60.0
+POLL_SECONDS = 0.05
+
+
+class LeaseTimeout(RuntimeError):
+    pass
+
+
+@contextmanager
+def lease(name, purpose, timeout=LEASE_TIMEOUT):
+    LOCKS_DIR.mkdir(parents=True, exist_ok=True)
+    path = LOCKS_DIR / f"{name}.lock"
+
+    with open(path, "a+") as f:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                if time.monotonic() >= deadline:
+                    f.seek(0)
+                    raise LeaseTimeout(f"{name} lease not acquired in {timeout}s (held by {f.read().strip()})")
+                time.sleep(POLL_SECONDS)
+
+        f.seek(0)
+        f.truncate()
+        f.write(json.dumps({
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "purpose": purpose,
+            "acquired_at": datetime.now(timezone.utc).isoformat(),
+        }))
+        f.flush()
+        try:
+            yield
+        finally:
+            f.seek(0)
+            f.truncate()
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# --------------------------------------------------
+# Versioned state pointer
+# --------------------------------------------------
+
+def read_state():
+    if not STATE_FILE.exists():
+        return None
+    with open(STATE_FILE) as f:
+        return json.load(f)
+
+
+def new_state(previous, run_id, divisor, **fields):
+    # Next version of the pointer (previous None: index launch)
+    state = dict(previous or {}, **fields)
+    state.update({
+        "version": (previous or {}).get("version", 0) + 1,
+        "run_id": run_id,
+        "divisor": divisor,
+    })
+    return state
+
+
+def publish_state(state):
+    # Outside the tick journal, so made durable here
+    tmp = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, STATE_FILE)
+    tick_log.fsync_dir(DATA_DIR)
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import re
+import sys
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from paths import EXCLUSIONS_FILE, OVERRIDE_FILE, EXCLUSION_RULES_CACHE
+
+# --------------------------------------------------
+# ARES exclusion rules
+#
+# exclusions.yaml: one list per category (stablecoins, staked,
+# wrapped, non_utility, ...). Each entry is a rule:
+#
+#   usdt                    symbol, case-insensitive
+#   {exact: TETH}           symbol, case-sensitive
+#   {prefix: "usd"}         symbol prefix, case-insensitive
+#   {regex: "^w.*eth$"}     symbol search, case-insensitive
+#                           (no capturing groups or global flags:
+#                           use (?:...) and (?i:...))
+#   {asset_id: 42}          canonical asset (asset_registry.py)
+#
+# human_override.yaml blacklist entries are case-insensitive
+# symbol rules in the "human_override" category and take
+# precedence in the audit trail.
+#
+# Both files compile into one lookup structure: dicts for the
+# exact / case-insensitive / asset_id rules and a single regex
+# alternation (one named group per pattern rule). The compiled
+# rules are cached in ares/exclusions/compiled_rules.json, keyed
+# by the sha256 of both YAML files, and re-compiled only when
+# either file changes.
+#
+# Applying them is one vectorized pass that labels every asset
+# with the first rule that excludes it ("<category>:<rule>"):
+#
+#   python scripts/exclusion_rules.py compile
+#   python scripts/exclusion_rules.py check USDT WBTC
+# --------------------------------------------------
+
+HUMAN_CATEGORY = "human_override"
+
+# Part of the cache key: bump when compile_rules changes
+CACHE_VERSION = 2
+
+# Memoized per process: {hash: (rules, compiled regex)}
+_loaded = {}
+
+
+def source_hash(paths):
+    h = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+    for path in paths:
+        h.update(path.name.encode())
+        h.update(path.read_bytes() if path.exists() else b"")
+    return h.hexdigest()
+
+
+# --------------------------------------------------
+# Compilation
+# --------------------------------------------------
+
+def check_regex(category, source):
+    # Pattern rules are embedded as one named group each in a single
+    # alternation: their own groups would shift the group → rule
+    # mapping, and global inline flags are only valid at its start
+    try:
+        compiled = re.compile(source)
+    except re.error as e:
+        raise RuntimeError(f"Invalid regex in {category}: {source!r} ({e})")
+    if compiled.groups:
+        raise RuntimeError(f"Regex in {category} must not capture, use (?:...): {source!r}")
+    if compiled.flags & ~re.UNICODE:
+        raise RuntimeError(f"Regex in {category} must not set global flags, use (?i:...): {source!r}")
+
+
+def compile_rules(auto, human):
+    # auto: {category: [entry, ...]}, human: human_override.yaml
+    # Later rules never overwrite earlier ones: the first label wins
+    rules = {"symbols": {}, "exact": {}, "asset_ids": {}, "patterns": []}
+
+    blacklist = human.get("blacklist") if isinstance(human.get("blacklist"), list) else []
+    for entry in blacklist:
+        if entry.get("symbol"):
+            symbol = str(entry["symbol"])
+            rules["symbols"].setdefault(symbol.lower(), f"{HUMAN_CATEGORY}:{symbol}")
+
+    for category, entries in auto.items():
+        for entry in entries or []:
+            if not isinstance(entry, dict):
+                entry = {"symbol": entry}
+            if len(entry) != 1:
+                raise RuntimeError(f"Exclusion rule in {category} must have one key: {entry}")
+            (kind, value), = entry.items()
+            value = str(value)
+
+            if kind == "symbol":
+                rules["symbols"].setdefault(value.lower(), f"{category}:{value}")
+            elif kind == "exact":
+                rules["exact"].setdefault(value, f"{category}:{value}")
+            elif kind == "asset_id":
+                rules["asset_ids"].setdefault(str(int(value)), f"{category}:asset_id={value}")
+            elif kind == "prefix":
+                rules["patterns"].append(["^" + re.escape(value), f"{category}:prefix={value}"])
+            elif kind == "regex":
+                check_regex(category, value)
+                rules["patterns"].append([value, f"{category}:regex={value}"])
+            else:
+                raise RuntimeError(f"Unknown exclusion rule kind in {category}: {kind}")
+
+    return rules
+
+
+def pattern_regex(rules):
+    # One alternation; the matching group tells which rule fired
+    if not rules["patterns"]:
+        return None
+    return re.compile(
+        "|".join(f"(?P<r{i}>{source})" for i, (source, _) in enumerate(rules["patterns"])),
+        re.IGNORECASE,
+    )
+
+
+def load(sources=(EXCLUSIONS_FILE, OVERRIDE_FILE), cache=EXCLUSION_RULES_CACHE):
+    digest = source_hash(sources)
+    if digest in _loaded:
+        return _loaded[digest]
+
+    rules = None
+    if cache is not None and cache.exists():
+        with open(cache) as f:
+            cached = json.load(f)
+        if cached.get("hash") == digest:
+            rules = cached["rules"]
+
+    if rules is None:
+        auto_path, human_path = sources
+        auto = yaml.safe_load(auto_path.read_text()) if auto_path.exists() else None
+        human = yaml.safe_load(human_path.read_text()) if human_path.exists() else None
+        rules = compile_rules(auto or {}, human or {})
+
+        if cache is not None:
+            tmp = cache.with_name(cache.name + ".tmp")
+            with open(tmp, "w") as f:
+                json.dump({"hash": digest, "rules": rules}, f, indent=2)
+            os.replace(tmp, cache)
+
+    _loaded.clear()
+    _loaded[digest] = (rules, pattern_regex(rules))
+    return _loaded[digest]
+
+
+# --------------------------------------------------
+# Application
+# --------------------------------------------------
+
+def matching_rules(df, compiled=None):
+    # → Series of rule labels aligned with df (None: not excluded)
+    rules, regex = compiled or load()
+    symbol = df["symbol"].astype(str)
+
+    rule = symbol.str.lower().map(rules["symbols"])
+    rule = rule.fillna(symbol.map(rules["exact"]))
+    if rules["asset_ids"] and "asset_id" in df:
+        rule = rule.fillna(df["asset_id"].astype(str).map(rules["asset_ids"]))
+
+    if regex is not None:
+        hit = symbol.str.extract(regex).notna().to_numpy()
+        labels = np.array([label for _, label in rules["patterns"]], dtype=object)
+        fired = np.where(hit.any(axis=1), labels[hit.argmax(axis=1)], None)
+        rule = rule.fillna(pd.Series(fired, index=df.index))
+
+    return rule.astype(object).where(rule.notna(), None)
+
+
+def split(df, compiled=None):
+    # → (kept, excluded with a "rule" column)
+    rule = matching_rules(df, compiled)
+    excluded = rule.notna().to_numpy()
+    return df[~excluded].copy(), df[excluded].assign(rule=rule[excluded])
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "compile"
+    if command not in ("compile", "check"):
+        sys.exit("usage: exclusion_rules.py compile | check SYMBOL...")
+
+    rules, regex = load()
+    if command == "compile":
+        print(
+            f"▶ {len(rules['symbols'])} symbol, {len(rules['exact'])} exact, "
+            f"{len(rules['asset_ids'])} asset_id, {len(rules['patterns'])} pattern rules "
+            f"→ {EXCLUSION_RULES_CACHE}"
+        )
+    else:
+        symbols = pd.DataFrame({"symbol": sys.argv[2:]})
+        for symbol, rule in zip(symbols["symbol"], matching_rules(symbols, (rules, regex))):
+            print(f"{symbol:<12} {rule or '-'}")
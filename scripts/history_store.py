@@ -0,0 +1,182 @@
+import csv
+import mmap
+import os
+import struct
+from pathlib import Path
+from datetime import datetime, timezone, timedelta
+
+# --------------------------------------------------
+# Append-only index history
+#
+# index_history.bin is a 16-byte header followed by fixed-width
+# little-endian records:
+#
+#   int64   timestamp (microseconds since epoch, UTC)
+#   float64 raw_value
+#   float64 index_value
+#
+# Appends and last-row reads are a single seek; time-range reads
+# bisect the memory-mapped timestamps. index_history.csv is kept
+# as a compatibility export (appended per row, or rebuilt with
+# export_csv()).
+# --------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "index_data"
+
+HISTORY_BIN = DATA_DIR / "index_history.bin"
+HISTORY_CSV = DATA_DIR / "index_history.csv"
+
+MAGIC = b"IDXHIST1"
+HEADER = struct.Struct("<8sII")
+RECORD = struct.Struct("<qdd")
+
+CSV_COLUMNS = ["timestamp_utc", "raw_value", "index_value"]
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_US = timedelta(microseconds=1)
+
+
+def to_micros(ts):
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    return (ts - EPOCH) // ONE_US
+
+
+def from_micros(us):
+    return (EPOCH + timedelta(microseconds=us)).isoformat()
+
+
+class HistoryStore:
+    def __init__(self, path=HISTORY_BIN, csv_path=HISTORY_CSV):
+        self.path = Path(path)
+        self.csv_path = Path(csv_path) if csv_path else None
+
+        if not self.path.exists():
+            self._create()
+
+    # --------------------------------------------------
+    # Setup / migration
+    # --------------------------------------------------
+
+    def _create(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, 1, RECORD.size))
+
+            # One-off import of the legacy CSV history
+            if self.csv_path and self.csv_path.exists():
+                with open(self.csv_path, newline="") as src:
+                    for r in csv.DictReader(src):
+                        f.write(RECORD.pack(
+                            to_micros(r["timestamp_utc"]),
+                            float(r["raw_value"]),
+                            float(r["index_value"]),
+                        ))
+
+        os.replace(tmp, self.path)
+
+    def _count(self, size):
+        # A torn trailing record (crash mid-append) is ignored
+        return (size - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self._count(self.path.stat().st_size)
+
+    # --------------------------------------------------
+    # Writes
+    # --------------------------------------------------
+
+    def append(self, timestamp, raw_value, index_value):
+        rec = RECORD.pack(to_micros(timestamp), float(raw_value), float(index_value))
+
+        with open(self.path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            end = HEADER.size + self._count(size) * RECORD.size
+            if end != size:
+                f.truncate(end)
+                f.seek(end)
+            f.write(rec)
+
+        if self.csv_path:
+            self._append_csv(timestamp, raw_value, index_value)
+
+    def _append_csv(self, timestamp, raw_value, index_value):
+        new = not self.csv_path.exists()
+        with open(self.csv_path, "a", newline="") as f:
+            w = csv.writer(f, lineterminator="\n")
+            if new:
+                w.writerow(CSV_COLUMNS)
+            w.writerow([
+                timestamp if isinstance(timestamp, str) else timestamp.isoformat(),
+                repr(float(raw_value)),
+                repr(float(index_value)),
+            ])
+
+    # --------------------------------------------------
+    # Reads
+    # --------------------------------------------------
+
+    def _row(self, us, raw_value, index_value):
+        return {
+            "timestamp_utc": from_micros(us),
+            "raw_value": raw_value,
+            "index_value": index_value,
+        }
+
+    def last(self):
+        with open(self.path, "rb") as f:
+            n = self._count(f.seek(0, os.SEEK_END))
+            if n == 0:
+                return None
+            f.seek(HEADER.size + (n - 1) * RECORD.size)
+            return self._row(*RECORD.unpack(f.read(RECORD.size)))
+
+    def _bisect(self, mm, n, us):
+        lo, hi = 0, n
+        while lo < hi:
+            mid = (lo + hi) // 2
+            t = struct.unpack_from("<q", mm, HEADER.size + mid * RECORD.size)[0]
+            if t < us:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def read_range(self, start=None, end=None):
+        # Rows with start <= timestamp < end (either bound optional)
+        with open(self.path, "rb") as f:
+            n = self._count(f.seek(0, os.SEEK_END))
+            if n == 0:
+                return []
+
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                lo = 0 if start is None else self._bisect(mm, n, to_micros(start))
+                hi = n if end is None else self._bisect(mm, n, to_micros(end))
+
+                return [
+                    self._row(*RECORD.unpack_from(mm, HEADER.size + i * RECORD.size))
+                    for i in range(lo, hi)
+                ]
+
+    def export_csv(self, path=None):
+        path = Path(path or self.csv_path)
+        tmp = path.with_suffix(".tmp")
+
+        with open(tmp, "w", newline="") as f:
+            w = csv.writer(f, lineterminator="\n")
+            w.writerow(CSV_COLUMNS)
+            for r in self.read_range():
+                w.writerow([r["timestamp_utc"], repr(r["raw_value"]), repr(r["index_value"])])
+
+        os.replace(tmp, path)
+        return path
+
+
+if __name__ == "__main__":
+    # python scripts/history_store.py  → rebuild index_history.csv from the store
+    store = HistoryStore()
+    print("History rows:", len(store))
+    print("Exported:", store.export_csv())
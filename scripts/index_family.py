@@ -0,0 +1,224 @@
+import csv
+import json
+from pathlib import Path
+
+from history_store import HistoryStore
+import index_math
+import tick_log
+
+# --------------------------------------------------
+# Index family
+#
+# Variants of the flagship index (config/index.yaml, "indices:")
+# computed from the same post-exclusion universe in one pass:
+# the universe is ranked once and each definition takes its
+# top-N and weights it. Ticks price every variant from the one
+# CoinGecko markets request of the flagship tick.
+#
+# Per index:
+#   ares_eval/<run_id>/index_<name>.csv      constituents at rebalance
+#   index_data/indices/<name>/index_state.json
+#   index_data/indices/<name>/index_history.bin
+#   docs/data/index_family.json              latest value of every index
+#
+# Constituents carry "units": weight / entry market cap, so that
+# Σ units · market_cap is the value of the target portfolio and
+# drifts with prices until the next rebalance. A constituent
+# change (new run_id) rescales the divisor on its first tick so
+# the index value is continuous.
+#
+# A tick is compute() (no writes; changed index_state.json files
+# go into the tick's journal record) then apply(). An index whose
+# constituents cannot all be priced skips the tick on its own.
+# --------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+INDEX_CONFIG_FILE = BASE_DIR / "config" / "index.yaml"
+EVAL_ROOT = BASE_DIR / "ares_eval"
+INDICES_DIR = BASE_DIR / "index_data" / "indices"
+FAMILY_JSON = BASE_DIR / "docs" / "data" / "index_family.json"
+
+PREFIX = "index_"
+COLUMNS = ["symbol", "entry_market_cap", "rank", "weight", "units", "asset_id"]
+
+
+def load_definitions(path=INDEX_CONFIG_FILE):
+    import yaml
+    import weighting
+
+    cfg = yaml.safe_load(Path(path).read_text()) or {}
+    definitions = cfg.get("indices") or []
+
+    names = [d["name"] for d in definitions]
+    if len(set(names)) != len(names):
+        raise RuntimeError(f"Duplicate index names in {path}")
+
+    return [weighting.validate(d) for d in definitions]
+
+
+def frame_name(name):
+    return f"{PREFIX}{name}"
+
+
+# --------------------------------------------------
+# Selection (rebalance path)
+# --------------------------------------------------
+
+def select(filtered, definitions):
+    import pandas as pd
+    import weighting
+
+    # One partial top-K serves every index; each takes its own top-N
+    size = max((d["size"] for d in definitions), default=0)
+    order = weighting.top_k(filtered["market_cap"].to_numpy(dtype=float), size)
+    ranked = filtered.iloc[order].reset_index(drop=True)
+
+    selections = {}
+    for d in definitions:
+        top = ranked.head(d["size"])
+        if len(top) < d["size"]:
+            raise RuntimeError(f"{d['name']}: only {len(top)} eligible assets for size {d['size']}")
+
+        caps = top["market_cap"].to_numpy(dtype=float)
+        weights = weighting.weights(caps, d)
+
+        selections[frame_name(d["name"])] = pd.DataFrame({
+            "symbol": top["symbol"],
+            "entry_market_cap": caps,
+            "rank": range(1, len(top) + 1),
+            "weight": weights,
+            "units": weights / caps,
+            "asset_id": top["asset_id"],
+        })[COLUMNS]
+
+    return selections
+
+
+# --------------------------------------------------
+# Tick path (stdlib only)
+# --------------------------------------------------
+
+def load_constituents(run_id):
+    # The run's index_<name>.csv files are the family it selected;
+    # config is only read when an index is first launched
+    family = {}
+    for path in sorted((EVAL_ROOT / run_id).glob(f"{PREFIX}*.csv")):
+        with open(path, newline="") as f:
+            family[path.stem[len(PREFIX):]] = list(csv.DictReader(f))
+    return family
+
+
+def symbols(family):
+    return [r["symbol"] for rows in family.values() for r in rows]
+
+
+def index_dir(name):
+    return INDICES_DIR / name
+
+
+def load_state(name):
+    path = state_path(name)
+    if not path.exists():
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def state_path(name):
+    return index_dir(name) / "index_state.json"
+
+
+def history(name):
+    return HistoryStore(path=index_dir(name) / "index_history.bin", csv_path=None)
+
+
+def tick_index(name, constituents, caps, timestamp, run_id):
+    # → (result, new index_state.json or None)
+    rows = [
+        {"symbol": r["symbol"], "weight": float(r["units"]), "market_cap": caps[r["symbol"]]}
+        for r in constituents
+    ]
+    raw_value = index_math.raw_value(rows)
+
+    state = load_state(name)
+    changed = None
+
+    if state is None:
+        # First-ever tick of this index
+        d = {d["name"]: d for d in load_definitions()}[name]
+        base_value = float(d.get("base_value", 1000))
+        state = changed = {
+            "weighting": d["weighting"],
+            "base_value": base_value,
+            "divisor": raw_value / base_value,
+            "created_at": timestamp,
+            "run_id": run_id,
+        }
+    elif state.get("run_id") != run_id:
+        # New constituents: continue from the last published value
+        last = history(name).last()
+        level = last["index_value"] if last else state["base_value"]
+        state = changed = dict(
+            state,
+            divisor=raw_value / level,
+            run_id=run_id,
+            last_rebalance_at=timestamp,
+        )
+
+    index_value = index_math.index_value(raw_value, state["divisor"])
+    result = {
+        "name": name,
+        "weighting": state["weighting"],
+        "size": len(rows),
+        "value": round(index_value, 6),
+        "raw_value": raw_value,
+        "index_value": index_value,
+    }
+    return result, changed
+
+
+def compute(family, caps, timestamp, run_id):
+    # A failing index skips this tick (no history row, no state
+    # change); the flagship and the other indices still tick
+    results, states = [], {}
+    for name, rows in family.items():
+        missing = [r["symbol"] for r in rows if r["symbol"] not in caps]
+        if missing:
+            print(f"⚠ {name}: no market cap for {', '.join(missing)}, tick skipped")
+            continue
+        try:
+            result, changed = tick_index(name, rows, caps, timestamp, run_id)
+        except (RuntimeError, ValueError, ZeroDivisionError) as e:
+            print(f"⚠ {name}: {e}, tick skipped")
+            continue
+
+        results.append(result)
+        if changed:
+            states[tick_log.state_key(state_path(name))] = changed
+    return results, states
+
+
+def apply(results, timestamp):
+    # State files were written from the journal record already
+    for r in results:
+        history(r["name"]).append(timestamp, r["raw_value"], r["index_value"])
+    publish(timestamp, results)
+
+
+def publish(timestamp, results):
+    payload = {"as_of": timestamp, "indices": results}
+    FAMILY_JSON.parent.mkdir(parents=True, exist_ok=True)
+    tick_log.write_atomic(FAMILY_JSON, json.dumps(payload, indent=2))
+
+
+if __name__ == "__main__":
+    # Print the family as selected for the current (or given) run
+    import sys
+
+    run_id = sys.argv[1] if len(sys.argv) > 1 else (BASE_DIR / "CURRENT_RUN.txt").read_text().strip()
+    family = load_constituents(run_id)
+
+    for name, rows in family.items():
+        print(f"\n▶ {name} ({len(rows)} assets)")
+        for r in rows:
+            print(f"  Rank {r['rank']} | {r['symbol']} | weight={float(r['weight']):.4f}")
@@ -0,0 +1,49 @@
+import math
+
+# --------------------------------------------------
+# Per-tick index arithmetic
+#
+# Plain-Python on purpose: a tick is arithmetic over ten rows
+# and should not need pandas. rows are mappings with at least
+# symbol, weight and market_cap.
+# --------------------------------------------------
+
+REQUIRED_COLUMNS = {"symbol", "weight", "market_cap"}
+
+
+def raw_value(rows):
+    # fsum: exactly rounded, independent of row order
+    return math.fsum(float(r["weight"]) * float(r["market_cap"]) for r in rows)
+
+
+def index_value(raw, divisor):
+    if divisor <= 0:
+        raise RuntimeError("Invalid divisor detected")
+    return raw / divisor
+
+
+def constituents_payload(rows, timestamp):
+    # Normalize weights defensively (in case upstream changes)
+    weight_sum = math.fsum(float(r["weight"]) for r in rows)
+    if weight_sum <= 0:
+        raise RuntimeError("Invalid weights: sum is zero or negative")
+
+    payload = {
+        "as_of": timestamp,
+        "method": "free-float market cap",
+        "constituents": [
+            {
+                "symbol": r["symbol"],
+                "weight": round(float(r["weight"]) / weight_sum, 4),
+                "market_cap": float(r["market_cap"]),
+            }
+            for r in rows
+        ],
+    }
+
+    # Optional safety check (recommended, silent in production)
+    total_weight = sum(c["weight"] for c in payload["constituents"])
+    if abs(total_weight - 1.0) > 1e-6:
+        raise RuntimeError(f"Constituent weights do not sum to 1.0 (sum={total_weight})")
+
+    return payload
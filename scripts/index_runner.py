@@ -1,8 +1,20 @@
-import subprocess
-import sys
+import argparse
 import json
-import pandas as pd
+import signal
+import threading
+import time
 from pathlib import Path
+from history_store import HistoryStore
+from constituent_archive import ConstituentArchive
+from run_manifest import RunManifest
+import coordination
+import tick_log
+import collect_top10_marketcap
+import index_family
+from paths import ENGINE_CONFIG_FILE
+import index_math
+import rollups
+import analytics
 from datetime import datetime, timezone
 
 
@@ -13,14 +25,14 @@ from datetime import datetime, timezone
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "index_data"
-DATA_DIR.mkdir(exist_ok=True)
 
 MARKETCAP_FILE = DATA_DIR / "latest_marketcaps.csv"
 HISTORY_FILE = DATA_DIR / "index_history.csv"
 STATE_FILE = DATA_DIR / "index_state.json"
+TICK_MANIFEST = "tick_manifest.json"
 
-PY = sys.executable
 BASE_INDEX_VALUE = 1000.0
+DEFAULT_TICK_SECONDS = 1800
 
 
 # --------------------------------------------------
@@ -28,170 +40,372 @@ BASE_INDEX_VALUE = 1000.0
 # --------------------------------------------------
 
 DOCS_DATA_DIR = BASE_DIR / "docs" / "data"
-DOCS_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 DASHBOARD_JSON = DOCS_DATA_DIR / "index_timeseries.json"
 CONSTITUENTS_JSON = DOCS_DATA_DIR / "constituents.json"
 
+# Keep the series file from growing forever
+MAX_POINTS = 2000
+
 
 
 # --------------------------------------------------
-# Step 1: Collect latest market caps
+# Warm state
+#
+# Everything a tick needs besides live market caps. The one-shot
+# run loads it once; the daemon keeps it in memory and reloads it
+# only when a rebalance / emergency adjustment publishes a new
+# version of the state pointer (index_state.json: run_id +
+# divisor, see coordination.py). CURRENT_RUN.txt only names the
+# run before the index is launched.
 # --------------------------------------------------
 
-print("\n▶ Collecting market caps...")
-subprocess.run(
-    [PY, "scripts/collect_top10_marketcap.py"],
-    check=True
-)
+def read_pointer():
+    pointer = coordination.read_state()
+    run_id = (pointer or {}).get("run_id") or collect_top10_marketcap.current_run_id()
+    return pointer, run_id
 
-df = pd.read_csv(MARKETCAP_FILE)
 
-required_cols = {"symbol", "weight", "market_cap"}
-if not required_cols.issubset(df.columns):
-    raise RuntimeError("Market cap file missing required columns")
+def state_stamp(pointer, run_id):
+    return run_id, (pointer or {}).get("version"), (pointer or {}).get("divisor")
 
-# --------------------------------------------------
-# Step 2: Calculate RAW index value
-# --------------------------------------------------
 
-raw_value = (df["weight"] * df["market_cap"]).sum()
+def load_dashboard():
+    if DASHBOARD_JSON.exists():
+        with open(DASHBOARD_JSON, "r") as f:
+            return json.load(f)
+    return None
 
-timestamp = datetime.now(timezone.utc).isoformat()
 
-# --------------------------------------------------
-# Step 3: Load or initialize divisor
-# --------------------------------------------------
+class TickState:
+    def __init__(self):
+        self.stamp = None
 
-if not STATE_FILE.exists():
-    # First-ever index launch
-    divisor = raw_value / BASE_INDEX_VALUE
+    def stale(self):
+        return self.stamp != state_stamp(*read_pointer())
 
-    state = {
-        "base_value": BASE_INDEX_VALUE,
-        "divisor": divisor,
-        "created_at": timestamp
-    }
+    def load(self):
+        DATA_DIR.mkdir(exist_ok=True)
+        DOCS_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
+        # One read of the pointer: run_id and divisor always match
+        pointer, self.run_id = read_pointer()
+        self.stamp = state_stamp(pointer, self.run_id)
+        self.top10 = collect_top10_marketcap.read_top10(self.run_id)
+        self.family = index_family.load_constituents(self.run_id)
+        self.divisor = pointer["divisor"] if pointer else None
+        self.dashboard = load_dashboard()
+        self.history = HistoryStore(csv_path=HISTORY_FILE)
+        self.archive = ConstituentArchive()
+        print(f"\n▶ State loaded for run {self.run_id}")
 
-    print("\nIndex initialized at base value 1000")
 
-else:
-    with open(STATE_FILE) as f:
-        state = json.load(f)
+# --------------------------------------------------
+# Step 1: Collect latest market caps
+# --------------------------------------------------
 
-    divisor = state["divisor"]
+def collect_market_caps(state):
+    print("\n▶ Collecting market caps...")
 
-    # Safety check
-    if divisor <= 0:
-        raise RuntimeError("Invalid divisor detected")
+    # One markets request prices the flagship and the whole family;
+    # only the flagship's symbols must all be priced (a family index
+    # missing a cap skips its tick in index_family.compute)
+    flagship = [r["symbol"] for r in state.top10]
+    symbols = flagship + index_family.symbols(state.family)
+    caps = collect_top10_marketcap.market_caps(symbols, state.run_id, required=flagship)
 
+    rows = collect_top10_marketcap.collect(state.top10, state.run_id, caps)
 
-# --------------------------------------------------
-# Step 4: Calculate normalized index value
-# --------------------------------------------------
+    required_cols = index_math.REQUIRED_COLUMNS
+    if not rows or not required_cols.issubset(rows[0]):
+        raise RuntimeError("Market cap file missing required columns")
 
-index_value = raw_value / divisor
+    return rows, caps
 
-row = {
-    "timestamp_utc": timestamp,
-    "raw_value": float(raw_value),
-    "index_value": float(index_value)
-}
 
 # --------------------------------------------------
-# Step 5: Persist history
+# Step 3: Load or initialize divisor
 # --------------------------------------------------
 
-if HISTORY_FILE.exists():
-    hist = pd.read_csv(HISTORY_FILE)
-    hist = pd.concat([hist, pd.DataFrame([row])], ignore_index=True)
-else:
-    hist = pd.DataFrame([row])
-
-hist.to_csv(HISTORY_FILE, index=False)
+def load_divisor(state, raw_value, timestamp):
+    # → (divisor, new index_state.json or None); written from the journal
+    if state.divisor is not None:
+        return state.divisor, None
 
+    # First-ever index launch: version 1 of the state pointer
+    divisor = raw_value / BASE_INDEX_VALUE
+    index_state = coordination.new_state(
+        None, state.run_id, divisor,
+        base_value=BASE_INDEX_VALUE,
+        created_at=timestamp,
+    )
+    return divisor, index_state
 
 
 # --------------------------------------------------
 # Step 6: Update dashboard JSON (append-only)
 # --------------------------------------------------
 
-dashboard_entry = {
-    "time": timestamp,
-    "value": round(float(index_value), 6)
-}
-
-if DASHBOARD_JSON.exists():
-    with open(DASHBOARD_JSON, "r") as f:
-        dashboard_data = json.load(f)
-else:
-    dashboard_data = {
-        "symbol": "CRYP_INDEX",
-        "interval": "30m",
-        "last_updated": timestamp,
-        "data": []
+def update_dashboard(state, timestamp, index_value):
+    dashboard_entry = {
+        "time": timestamp,
+        "value": round(float(index_value), 6)
     }
 
-# Append new point
-dashboard_data["data"].append(dashboard_entry)
-dashboard_data["last_updated"] = timestamp
+    if state.dashboard is None:
+        state.dashboard = {
+            "symbol": "CRYP_INDEX",
+            "interval": "30m",
+            "last_updated": timestamp,
+            "data": []
+        }
 
-# Optional: keep file from growing forever (e.g. last 2000 points)
-MAX_POINTS = 2000
-if len(dashboard_data["data"]) > MAX_POINTS:
-    dashboard_data["data"] = dashboard_data["data"][-MAX_POINTS:]
+    dashboard_data = state.dashboard
+
+    # Append new point
+    dashboard_data["data"].append(dashboard_entry)
+    dashboard_data["last_updated"] = timestamp
 
-with open(DASHBOARD_JSON, "w") as f:
-    json.dump(dashboard_data, f, indent=2)
+    if len(dashboard_data["data"]) > MAX_POINTS:
+        del dashboard_data["data"][:-MAX_POINTS]
 
+    tick_log.write_atomic(DASHBOARD_JSON, json.dumps(dashboard_data, indent=2))
 
 
 # --------------------------------------------------
 # Step 6.5: Update constituents JSON (for dashboard)
 # --------------------------------------------------
 
-# Normalize weights defensively (in case upstream changes)
-weight_sum = df["weight"].sum()
-if weight_sum <= 0:
-    raise RuntimeError("Invalid weights: sum is zero or negative")
+def update_constituents(rows, timestamp):
+    constituents_payload = index_math.constituents_payload(rows, timestamp)
 
-constituents_payload = {
-    "as_of": timestamp,
-    "method": "free-float market cap",
-    "constituents": []
-}
+    tick_log.write_atomic(CONSTITUENTS_JSON, json.dumps(constituents_payload, indent=2))
 
-for _, row_df in df.iterrows():
-    normalized_weight = float(row_df["weight"] / weight_sum)
 
-    constituents_payload["constituents"].append({
-        "symbol": row_df["symbol"],
-        "weight": round(normalized_weight, 4),
-        "market_cap": float(row_df["market_cap"])
-    })
+# --------------------------------------------------
+# Tick
+# --------------------------------------------------
+
+def tick(state):
+    # One tick manifest, overwritten every tick
+    manifest = RunManifest("index_tick", state.run_id, out_dir=DATA_DIR, filename=TICK_MANIFEST)
+    collect_top10_marketcap.REQUEST_LOG.clear()
+
+    with manifest.recording():
+        result = None
+        while result is None:
+            with manifest.stage("collect_market_caps") as record:
+                rows, caps = collect_market_caps(state)
+                record["rows_out"] = {"latest_marketcaps": len(rows), "market_caps": len(caps)}
+
+            # From here to the commit the tick holds the index lease: a
+            # rebalance flips the state pointer before or after it, never
+            # in between. The network fetch stays outside the lease: if
+            # the state moved while we fetched, reload it, release the
+            # lease and fetch again.
+            with coordination.lease("index", "tick"):
+                with manifest.stage("recover") as record:
+                    # A previous tick died after its journal write: redo it
+                    record["recovered"] = tick_log.recover()
+
+                    # A rebalance published new constituents while we fetched
+                    record["reload"] = record["recovered"] or state.stale()
+                    if record["reload"]:
+                        state.load()
+
+                if not record["reload"]:
+                    result = tick_locked(state, manifest, rows, caps)
+
+        manifest.add_http("coingecko", collect_top10_marketcap.REQUEST_LOG)
+
+    # --------------------------------------------------
+    # Output
+    # --------------------------------------------------
+
+    print("\n==============================")
+    print("INDEX VALUE CALCULATED")
+    print("==============================")
+    print(f"Timestamp (UTC): {result['timestamp']}")
+    print(f"Raw value      : {int(result['raw_value'])}")
+    print(f"Index value    : {round(result['index_value'], 4)}")
+    print(f"Divisor        : {result['divisor']}")
+    print(f"Saved to       : {HISTORY_FILE}")
+
+    for r in result["family"]:
+        print(f"{r['name']:<15}: {round(r['value'], 4)}")
+
+
+def tick_locked(state, manifest, rows, caps):
+    # Caller holds the index lease; rows / caps priced the current state
+    # --------------------------------------------------
+    # Steps 2–4: raw value, divisor, normalized index value
+    # (and the family's); nothing is written yet
+    # --------------------------------------------------
+
+    with manifest.stage("compute", {"latest_marketcaps": len(rows)}):
+        raw_value = index_math.raw_value(rows)
+        timestamp = datetime.now(timezone.utc).isoformat()
+        divisor, index_state = load_divisor(state, raw_value, timestamp)
+
+        # (rejects a non-positive divisor)
+        index_value = index_math.index_value(raw_value, divisor)
+
+        family_values, states = index_family.compute(state.family, caps, timestamp, state.run_id)
+        if index_state:
+            states[tick_log.state_key(STATE_FILE)] = index_state
+
+    row = {
+        "timestamp_utc": timestamp,
+        "raw_value": float(raw_value),
+        "index_value": float(index_value)
+    }
 
-# Optional safety check (recommended, silent in production)
-total_weight = sum(c["weight"] for c in constituents_payload["constituents"])
-if abs(total_weight - 1.0) > 1e-6:
-    raise RuntimeError(f"Constituent weights do not sum to 1.0 (sum={total_weight})")
+    # --------------------------------------------------
+    # Step 5: Journal (the tick is durable from here on)
+    # --------------------------------------------------
+
+    # One fsync; the tick log is the one tick output kept in git,
+    # everything below is applied from it and can be redone
+    with manifest.stage("journal") as record:
+        head = tick_log.append(tick_log.make_record(
+            timestamp, row["raw_value"], row["index_value"], state.run_id,
+            rows, family_values, states,
+        ))
+        record["rows_out"] = {"ticks": 1}
+        record["segment"] = head["segment"]
+
+    with manifest.stage("apply_state", {"state": len(states)}):
+        tick_log.apply_state({"state": states})
+        if index_state:
+            print("\nIndex initialized at base value 1000")
+            # Our own write, not a rebalance: no reload needed
+            state.divisor = divisor
+            state.stamp = state_stamp(index_state, state.run_id)
+
+    # --------------------------------------------------
+    # Step 5.2: Persist history
+    # --------------------------------------------------
+
+    with manifest.stage("persist_history") as record:
+        # O(1) append to the binary store; index_history.csv gets one line
+        state.history.append(
+            row["timestamp_utc"], row["raw_value"], row["index_value"]
+        )
+        record["rows_out"] = {"index_history": 1}
+
+    # --------------------------------------------------
+    # Step 5.5: Returns / volatility / drawdown (online)
+    # --------------------------------------------------
+
+    with manifest.stage("analytics"):
+        analytics.update(state.history, timestamp, index_value)
+
+    with manifest.stage("dashboard"):
+        update_dashboard(state, timestamp, index_value)
+
+    # --------------------------------------------------
+    # Step 6.2: Update rollup tiers (30m / 1h / 1d / 1w)
+    # --------------------------------------------------
+
+    # Full history at every resolution; O(1) per tick. The 2000-point
+    # index_timeseries.json above is kept for the current dashboard build.
+    with manifest.stage("rollups"):
+        rollups.update(timestamp, index_value)
+
+    with manifest.stage("constituents", {"latest_marketcaps": len(rows)}):
+        collect_top10_marketcap.write(rows)
+        update_constituents(rows, timestamp)
+
+    # --------------------------------------------------
+    # Step 6.6: Archive this tick's constituent rows
+    # --------------------------------------------------
+
+    # latest_marketcaps.csv is overwritten; the archive keeps
+    # every tick (index_data/constituents/<day>/)
+    with manifest.stage("archive_constituents", {"latest_marketcaps": len(rows)}) as record:
+        state.archive.append(timestamp, rows, state.run_id)
+        record["rows_out"] = {"constituents": len(rows)}
+
+    # --------------------------------------------------
+    # Step 7: Index family (own divisors, state and history)
+    # --------------------------------------------------
+
+    with manifest.stage("index_family", {"indices": len(state.family)}):
+        index_family.apply(family_values, timestamp)
+
+    # --------------------------------------------------
+    # Step 8: Commit (HEAD.json: applied up to this tick)
+    # --------------------------------------------------
+
+    with manifest.stage("commit"):
+        tick_log.commit(head)
+
+    return {
+        "timestamp": timestamp,
+        "raw_value": raw_value,
+        "index_value": index_value,
+        "divisor": divisor,
+        "family": family_values,
+    }
 
-with open(CONSTITUENTS_JSON, "w") as f:
-    json.dump(constituents_payload, f, indent=2)
 
+def run():
+    state = TickState()
+    state.load()
+    tick(state)
 
 
 # --------------------------------------------------
-# Output
+# Daemon: warm state, fixed-rate ticks
+#   python scripts/index_runner.py --daemon [--interval 60]
 # --------------------------------------------------
 
-print("\n==============================")
-print("INDEX VALUE CALCULATED")
-print("==============================")
-print(f"Timestamp (UTC): {timestamp}")
-print(f"Raw value      : {int(raw_value)}")
-print(f"Index value    : {round(index_value, 4)}")
-print(f"Divisor        : {divisor}")
-print(f"Saved to       : {HISTORY_FILE}")
\ No newline at end of file
+def daemon(interval):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    state = TickState()
+    next_at = time.monotonic()
+    print(f"▶ Index daemon started, ticking every {interval}s")
+
+    while not stop.is_set():
+        try:
+            if state.stale():
+                state.load()
+            tick(state)
+        except Exception as e:
+            # A failed tick (e.g. CoinGecko down) is recorded in the
+            # tick manifest; the next one retries with the same state
+            print(f"✖ Tick failed: {type(e).__name__}: {e}")
+
+        # Fixed rate; a tick that overran skips its missed slots
+        next_at += interval
+        now = time.monotonic()
+        if next_at < now:
+            next_at = now + interval - (now - next_at) % interval
+        stop.wait(next_at - now)
+
+    print("▶ Index daemon stopped")
+
+
+def tick_seconds():
+    # yaml is only needed here, not on the one-shot tick
+    import yaml
+
+    cfg = yaml.safe_load(ENGINE_CONFIG_FILE.read_text())
+    return cfg.get("index", {}).get("tick_seconds", DEFAULT_TICK_SECONDS)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--daemon", action="store_true", help="keep running, one tick per interval")
+    ap.add_argument("--interval", type=float, help="seconds between daemon ticks")
+    args = ap.parse_args()
+
+    if args.daemon:
+        try:
+            daemon(args.interval or tick_seconds())
+        except KeyboardInterrupt:
+            print("\n▶ Index daemon stopped")
+    else:
+        run()
@@ -0,0 +1,270 @@
+import argparse
+import csv
+import json
+import math
+import socket
+import sys
+import time
+from datetime import datetime, timezone
+
+import index_math
+import coordination
+import tick_log
+from collect_top10_marketcap import read_top10
+from paths import EVAL_ROOT, CONTINUITY_CAPS
+
+# --------------------------------------------------
+# Streaming index
+#
+# Consumes per-constituent updates from a feed and keeps the
+# weighted sum Σ weight · market_cap current in O(1) per update.
+# Index values are emitted every --every seconds (and at the end
+# of a finite feed) from the state pointer (coordination.py): the
+# live run's top10.csv weights and its divisor, so they match what
+# index_runner.py computes for the same caps. When a rebalance
+# publishes a new pointer version the stream restarts from it.
+#
+# Starting caps: the last tick's, if it priced the live run, else
+# the run's continuity caps (what its divisor was set against),
+# else its entry market caps.
+#
+# An update is one JSON object per line:
+#   {"symbol": "BTC", "market_cap": 1.33e12}
+#   {"symbol": "BTC", "price": 67000.5}
+# A price scales the last market cap by price / previous price
+# (supply held constant); the first price seen for a symbol only
+# sets its reference. Non-constituents are ignored; updates with
+# neither field, a value that is not a positive number, or a line
+# that is not JSON at all are logged and skipped.
+#
+#   python scripts/index_stream.py --feed replay --source updates.jsonl
+#   python scripts/index_stream.py --feed socket --source 127.0.0.1:9100 --every 5
+# --------------------------------------------------
+
+DEFAULT_EMIT_SECONDS = 1.0
+
+
+# --------------------------------------------------
+# Feeds: iterables of update dicts; None means "idle, no update"
+# --------------------------------------------------
+
+def parse_line(line):
+    # A line that does not decode is passed on as its text, which
+    # StreamingIndex.apply rejects (logged and counted as skipped)
+    try:
+        return json.loads(line)
+    except ValueError:
+        return line.decode(errors="replace") if isinstance(line, bytes) else line
+
+
+def replay_feed(source, delay=0.0):
+    # Local replay of a recorded update file (JSON lines)
+    with open(source) as f:
+        for line in f:
+            if line.strip():
+                yield parse_line(line)
+                if delay:
+                    time.sleep(delay)
+
+
+def socket_feed(source, idle=1.0):
+    # Newline-delimited JSON over TCP; yields None when the
+    # socket is idle so the caller can still emit on cadence
+    host, _, port = source.rpartition(":")
+    with socket.create_connection((host, int(port))) as sock:
+        sock.settimeout(idle)
+        buf = b""
+        while True:
+            try:
+                chunk = sock.recv(65536)
+            except socket.timeout:
+                yield None
+                continue
+            if not chunk:
+                return
+            buf += chunk
+            *lines, buf = buf.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield parse_line(line)
+
+
+def stdin_feed(source=None):
+    for line in sys.stdin:
+        if line.strip():
+            yield parse_line(line)
+
+
+FEEDS = {
+    "replay": replay_feed,
+    "socket": socket_feed,
+    "stdin": stdin_feed,
+}
+
+
+# --------------------------------------------------
+# Incremental weighted sum
+# --------------------------------------------------
+
+def starting_caps(run_id):
+    record = tick_log.last()
+    if record is not None and record["run"] == run_id:
+        return {r["symbol"]: r["market_cap"] for r in tick_log.record_rows(record)}
+
+    path = EVAL_ROOT / run_id / CONTINUITY_CAPS
+    if path.exists():
+        with open(path, newline="") as f:
+            return {r["symbol"]: r["market_cap"] for r in csv.DictReader(f)}
+    return {}
+
+
+def read_constituents(run_id):
+    caps = starting_caps(run_id)
+    return [
+        {
+            "symbol": r["symbol"],
+            "weight": r["weight"],
+            "market_cap": caps.get(r["symbol"], r["entry_market_cap"]),
+        }
+        for r in read_top10(run_id)
+    ]
+
+
+def pointer_version():
+    pointer = coordination.read_state()
+    return pointer and pointer.get("version")
+
+
+def load_index():
+    # One read of the pointer: run_id and divisor always match
+    pointer = coordination.read_state()
+    if pointer is None:
+        raise RuntimeError("No index state pointer yet: run an index tick first")
+    index = StreamingIndex(read_constituents(pointer["run_id"]), pointer["divisor"])
+    return pointer.get("version"), index
+
+
+class StreamingIndex:
+    def __init__(self, rows, divisor):
+        self.weights = {r["symbol"]: float(r["weight"]) for r in rows}
+        self.caps = {r["symbol"]: float(r["market_cap"]) for r in rows}
+        self.prices = {}
+        self.divisor = divisor
+        self.updates = 0
+        self.skipped = 0
+
+        # Neumaier-compensated running sum: O(1) per update without
+        # the drift of naive += over millions of deltas
+        self.raw = index_math.raw_value(rows)
+        self.comp = 0.0
+
+    def _add(self, delta):
+        total = self.raw + delta
+        if abs(self.raw) >= abs(delta):
+            self.comp += (self.raw - total) + delta
+        else:
+            self.comp += (delta - total) + self.raw
+        self.raw = total
+
+    def apply(self, update):
+        try:
+            symbol = str(update.get("symbol", "")).upper()
+            if symbol not in self.weights:
+                return False
+            field = "market_cap" if "market_cap" in update else "price"
+            value = float(update[field])
+            if not (math.isfinite(value) and value > 0):
+                raise ValueError(f"{field} {value}")
+        except (AttributeError, KeyError, TypeError, ValueError):
+            # A malformed update must not end the stream (or poison
+            # the running sum): log it and keep going
+            self.skipped += 1
+            print(f"⚠ Skipped invalid update: {update!r}")
+            return False
+
+        if field == "market_cap":
+            cap = value
+        else:
+            previous = self.prices.get(symbol)
+            self.prices[symbol] = value
+            if not previous:
+                return False
+            cap = self.caps[symbol] * value / previous
+
+        self._add(self.weights[symbol] * (cap - self.caps[symbol]))
+        self.caps[symbol] = cap
+        self.updates += 1
+        return True
+
+    def raw_value(self):
+        return self.raw + self.comp
+
+    def index_value(self):
+        return index_math.index_value(self.raw_value(), self.divisor)
+
+
+# --------------------------------------------------
+# Stream loop
+# --------------------------------------------------
+
+def emit(index, out=None):
+    point = {
+        "time": datetime.now(timezone.utc).isoformat(),
+        "raw_value": index.raw_value(),
+        "index_value": index.index_value(),
+        "updates": index.updates,
+    }
+    print(f"{point['time']}  index={point['index_value']:.4f}  updates={point['updates']}")
+    if out:
+        out.write(json.dumps(point) + "\n")
+        out.flush()
+    return point
+
+
+def run(feed, every=DEFAULT_EMIT_SECONDS, out=None):
+    version, index = load_index()
+    print(f"▶ Streaming {len(index.weights)} constituents, start index {index.index_value():.4f}")
+
+    last_emit = time.monotonic()
+    emitted = 0
+
+    for update in feed:
+        now = time.monotonic()
+        due = now - last_emit >= every
+
+        # A rebalance / emergency adjustment published a new pointer
+        # version: restart from its constituents and divisor (checked
+        # on the emit cadence, before the update that is applied now)
+        if due and pointer_version() != version:
+            version, index = load_index()
+            print(f"▶ State pointer version {version}, constituents reloaded")
+
+        if update is not None:
+            index.apply(update)
+
+        if due:
+            emit(index, out)
+            last_emit = now
+            emitted += 1
+
+    # Finite feed (replay): always publish the final state
+    point = emit(index, out)
+    return index, point, emitted + 1
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--feed", choices=sorted(FEEDS), default="replay")
+    ap.add_argument("--source", help="replay file or host:port")
+    ap.add_argument("--every", type=float, default=DEFAULT_EMIT_SECONDS, help="seconds between emitted values")
+    ap.add_argument("--out", help="append emitted values here (JSON lines)")
+    args = ap.parse_args()
+
+    out = open(args.out, "a") if args.out else None
+    try:
+        run(FEEDS[args.feed](args.source), args.every, out)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if out:
+            out.close()
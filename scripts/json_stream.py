@@ -0,0 +1,76 @@
+import json
+
+# --------------------------------------------------
+# Incremental reader for top-level JSON arrays
+#
+# Yields one decoded element at a time from a file, reading
+# fixed-size chunks, so memory stays bounded by the largest
+# single element rather than by the whole payload.
+# --------------------------------------------------
+
+CHUNK_SIZE = 1 << 16
+WHITESPACE = " \t\n\r"
+DELIMITERS = WHITESPACE + ",]"
+
+_decoder = json.JSONDecoder()
+
+
+def iter_json_array(f, chunk_size=CHUNK_SIZE):
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        # drop what has been consumed so the buffer does not grow
+        buf = buf[pos:] + chunk
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    skip_ws()
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("Expected a top-level JSON array")
+    pos += 1
+
+    first = True
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            raise ValueError("Unterminated JSON array")
+        if buf[pos] == "]":
+            return
+        if not first:
+            if buf[pos] != ",":
+                raise ValueError(f"Expected ',' in JSON array, got {buf[pos]!r}")
+            pos += 1
+            skip_ws()
+        first = False
+
+        while True:
+            try:
+                item, end = _decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+
+            # a number may be cut at the chunk boundary: only accept
+            # the value once the delimiter after it is in the buffer
+            if end < len(buf) and buf[end] in DELIMITERS or eof:
+                break
+            fill()
+
+        pos = end
+        yield item
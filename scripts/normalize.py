@@ -0,0 +1,141 @@
+import heapq
+import json
+import sys
+
+import pandas as pd
+
+from paths import snapshot_dir, eval_dir
+from json_stream import iter_json_array
+from snapshot_store import open_payload, has_payload
+import provider_registry
+import weighting
+
+# --------------------------------------------------
+# Generic provider normalizer
+#
+# One function for every provider in the registry
+# (provider_registry.py): the payload's records are loaded
+# into one frame holding only the top-level keys the field
+# paths start from, and each output column is a chain of
+# vectorized .str.get() lookups down its dotted path.
+#
+#   <provider>_normalized   symbol, market_cap, native_id, name, slug
+#
+# Top-level array payloads are streamed (json_stream.py); with
+# "select: top_n" only a heap of the top_n records is kept while
+# streaming, and only those are extracted.
+#
+#   python scripts/normalize.py [provider ...]   (default: enabled)
+# --------------------------------------------------
+
+COLUMNS = provider_registry.REQUIRED_FIELDS + provider_registry.OPTIONAL_FIELDS
+
+
+def dig(x, path):
+    for key in path.split("."):
+        x = x.get(key) if isinstance(x, dict) else None
+    return x
+
+
+def top_records(items, p):
+    # Running top-N by market cap over a stream: memory stays
+    # bounded by top_n records, not by the provider's universe
+    top_n = p["top_n"]
+    cap_path = p["fields"]["market_cap"]
+    heap = []        # min-heap of (market_cap, -seq, record)
+    missing = []     # records without a cap, only used if < top_n have one
+
+    for seq, x in enumerate(items):
+        cap = dig(x, cap_path)
+        if cap is None:
+            if len(missing) < top_n:
+                missing.append(x)
+            continue
+
+        item = (cap, -seq, x)
+        if len(heap) < top_n:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    # Highest cap first; ties keep payload order (seq is unique,
+    # so records themselves are never compared)
+    top = [x for _, _, x in sorted(heap, key=lambda item: item[:2], reverse=True)]
+    return top + missing[:top_n - len(top)]
+
+
+def records(snap, p):
+    # → list of record dicts, holding only the keys the fields use
+    roots = {path.split(".")[0] for path in p["fields"].values()}
+    with open_payload(snap, p["name"]) as f:
+        if not p.get("records"):
+            items = iter_json_array(f)
+            if p.get("select") == "top_n":
+                items = top_records(items, p)
+            return [{k: x.get(k) for k in roots} for x in items]
+        payload = json.load(f)
+
+    for key in p["records"].split("."):
+        payload = payload.get(key) or {}
+    return payload or []
+
+
+def extract(recs, fields):
+    # Dotted paths → columns; a missing key anywhere gives NaN
+    roots = sorted({path.split(".")[0] for path in fields.values()})
+    raw = pd.DataFrame.from_records(recs, columns=roots)
+
+    out = {}
+    for column in COLUMNS:
+        if column not in fields:
+            out[column] = None
+            continue
+        root, *rest = fields[column].split(".")
+        s = raw[root]
+        for key in rest:
+            # Only object columns can hold nested records
+            s = s.str.get(key) if s.dtype == object else pd.Series(None, index=s.index, dtype=float)
+        out[column] = s
+    return pd.DataFrame(out, index=raw.index)
+
+
+def normalize(snap, p):
+    df = extract(records(snap, p), p["fields"])
+
+    if p.get("select") == "top_n" and p.get("records"):
+        # Enveloped payloads are cut here; streamed ones in top_records
+        df = df.iloc[weighting.top_k(df["market_cap"].to_numpy(dtype=float), p["top_n"])]
+
+    df = df.dropna(subset=["symbol", "market_cap"]).reset_index(drop=True)
+    df["symbol"] = df["symbol"].astype(str).str.upper()
+    df["native_id"] = df["native_id"].astype(str)
+
+    adapter = provider_registry.ADAPTERS.get(p["name"])
+    if adapter is not None:
+        df = adapter(df, p)
+    return df
+
+
+def normalize_all(snap, providers):
+    # → {provider: normalized frame} for every enabled provider
+    # with a payload in the snapshot
+    frames = {}
+    for p in provider_registry.enabled(providers):
+        if not has_payload(snap, p["name"]):
+            print(f"⚠ No {p['name']} payload in snapshot, skipped")
+            continue
+        frames[p["name"]] = normalize(snap, p)
+    return frames
+
+
+if __name__ == "__main__":
+    snap = snapshot_dir()
+    out = eval_dir()
+
+    providers = provider_registry.load()
+    if len(sys.argv) > 1:
+        providers = {name: dict(providers[name], enabled=True) for name in sys.argv[1:]}
+
+    for name, df in normalize_all(snap, providers).items():
+        df.to_csv(out / f"{name}_normalized.csv", index=False)
+        print(f"{name} normalization complete ({len(df)} assets)")
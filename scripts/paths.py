@@ -10,8 +10,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SNAPSHOTS_DIR = BASE_DIR / "snapshots"
 EVAL_ROOT = BASE_DIR / "ares_eval"
 
-SNAPSHOTS_DIR.mkdir(exist_ok=True)
-EVAL_ROOT.mkdir(exist_ok=True)
+# (no mkdir at import: snapshot_dir() / eval_dir() create on use)
 
 
 def current_run_id():
@@ -37,14 +36,25 @@ def eval_dir(run_id=None):
     return path
 
 
+# Market caps of a run's new top 10 at its rebalance (continuity)
+CONTINUITY_CAPS = "continuity_marketcaps.csv"
+
+
 # Config paths
 CONFIG_DIR = BASE_DIR / "config"
+ENGINE_CONFIG_FILE = CONFIG_DIR / "engine.yaml"
+PROVIDERS_CONFIG_FILE = CONFIG_DIR / "providers.yaml"
 STATE_FILE = CONFIG_DIR / "state.json"
 
 # Ares / exclusions
 ARES_DIR = BASE_DIR / "ares"
 EXCLUSIONS_DIR = ARES_DIR / "exclusions"
 OVERRIDE_FILE = EXCLUSIONS_DIR / "human_override.yaml"
+EXCLUSIONS_FILE = EXCLUSIONS_DIR / "exclusions.yaml"
+EXCLUSION_RULES_CACHE = EXCLUSIONS_DIR / "compiled_rules.json"
+
+# Provider native id → canonical asset_id (asset_registry.py)
+ASSET_IDS_FILE = ARES_DIR / "asset_ids.csv"
 
 # Index data
 INDEX_DATA_DIR = BASE_DIR / "index_data"
@@ -0,0 +1,208 @@
+import os
+import sys
+import json
+import yaml
+from fnmatch import fnmatch
+
+from paths import current_run_id, snapshot_dir, eval_dir, SNAPSHOTS_DIR, ENGINE_CONFIG_FILE, CONTINUITY_CAPS
+
+import provider_registry
+import normalize
+import asset_registry
+import consensus
+import apply_exclu_weight_rank
+import index_family
+from run_manifest import RunManifest, frame_rows
+
+
+# --------------------------------------------------
+# In-process ARES pipeline
+#
+# Every stage takes the frames produced so far and returns
+# the new frames it adds ({name: DataFrame}). Frame names match
+# the audit CSVs in ares_eval/<run_id>/ so persistence is just
+# "<name>.csv".
+# --------------------------------------------------
+
+# top10.csv and the family's index_<name>.csv are read by the
+# index tick, so they are written even when audit CSVs are disabled.
+PERSIST_ALWAYS = {"top10", f"{index_family.PREFIX}*"}
+
+
+def persist_audit_default():
+    return os.environ.get("ARES_AUDIT_CSV", "1") != "0"
+
+
+def normalized_frames(frames):
+    return {
+        name.replace("_normalized", ""): df
+        for name, df in frames.items()
+        if name.endswith("_normalized")
+    }
+
+
+# --------------------------------------------------
+# Stages
+# --------------------------------------------------
+
+def stage_normalize(frames, run):
+    # Every enabled provider through the one generic normalizer
+    return {
+        f"{provider}_normalized": df
+        for provider, df in normalize.normalize_all(run["snap"], run["providers"]).items()
+    }
+
+
+def stage_assets(frames, run):
+    # Provider native ids → canonical asset_id (int32) on every
+    # normalized frame; new ids are added to ares/asset_ids.csv
+    registry = asset_registry.AssetRegistry()
+    tagged = registry.assign(
+        normalized_frames(frames), run["run_id"], run["cfg"]["ares"]["tolerance_percent"],
+    )
+    print(f"Assets: {len(registry)} known, {registry.added} new provider ids")
+
+    # Replays are read-only: ids stay in memory
+    if run["eval"] is not None:
+        registry.save()
+    return {f"{provider}_normalized": df for provider, df in tagged.items()}
+
+
+def stage_consensus(frames, run):
+    # presence → quorum → tolerance on one asset × provider matrix
+    return consensus.run(
+        normalized_frames(frames),
+        run["cfg"]["ares"]["quorum"],
+        run["cfg"]["ares"]["tolerance_percent"],
+    )
+
+
+def stage_exclusions(frames, run):
+    filtered, excluded = apply_exclu_weight_rank.apply_exclusions(frames["ares_eligible_assets"])
+    print("Eligible assets after exclusions:", len(filtered))
+    return {"post_exclusion_assets": filtered, "excluded_assets": excluded}
+
+
+def stage_rank(frames, run):
+    top10 = apply_exclu_weight_rank.rank_and_weight(frames["post_exclusion_assets"], run["flagship"])
+    apply_exclu_weight_rank.print_portfolio(top10)
+    return {"top10": top10}
+
+
+def stage_index_family(frames, run):
+    # Every family index from the same post-exclusion universe
+    return index_family.select(frames["post_exclusion_assets"], run["indices"])
+
+
+# (name, stage, input frame patterns — for the run manifest's rows_in)
+STAGES = [
+    ("normalize", stage_normalize, []),
+    ("assets", stage_assets, ["*_normalized"]),
+    ("consensus", stage_consensus, ["*_normalized"]),
+    ("apply_exclusions", stage_exclusions, ["ares_eligible_assets"]),
+    ("apply_weight_rank", stage_rank, ["post_exclusion_assets"]),
+    ("index_family", stage_index_family, ["post_exclusion_assets"]),
+]
+
+
+# --------------------------------------------------
+# Runner
+# --------------------------------------------------
+
+def stage_inputs(frames, patterns):
+    return {
+        name: len(df)
+        for name, df in frames.items()
+        if any(fnmatch(name, p) for p in patterns)
+    }
+
+
+def run_pipeline(run_id=None, persist=None, stages=STAGES, cfg=None, readonly=False, manifest=None):
+    # readonly: write nothing at all (not even top10.csv), e.g. for replays
+    if run_id is None:
+        run_id = current_run_id()
+    if persist is None:
+        persist = persist_audit_default()
+
+    run = {
+        "run_id": run_id,
+        "snap": SNAPSHOTS_DIR / run_id if readonly else snapshot_dir(run_id),
+        "eval": None if readonly else eval_dir(run_id),
+        "cfg": cfg or yaml.safe_load(ENGINE_CONFIG_FILE.read_text()),
+        "providers": provider_registry.load(),
+        "flagship": apply_exclu_weight_rank.load_flagship(),
+        "indices": index_family.load_definitions(),
+    }
+
+    if manifest is None:
+        manifest = RunManifest("pipeline", run_id, run["eval"])
+
+    frames = {}
+
+    for name, stage, inputs in stages:
+        print(f"▶ Running: {name}")
+        with manifest.stage(name, stage_inputs(frames, inputs)) as record:
+            produced = stage(frames, run)
+            record["rows_out"] = frame_rows(produced)
+
+            if not readonly:
+                for key, df in produced.items():
+                    if persist or any(fnmatch(key, p) for p in PERSIST_ALWAYS):
+                        df.to_csv(run["eval"] / f"{key}.csv", index=False)
+
+        frames.update(produced)
+
+    return frames, manifest.stages
+
+
+def run_full(manifest, persist=None):
+    # Snapshot → selection → continuity market caps, all in one interpreter
+    import snapshot_fetcher
+    import collect_top10_marketcap
+
+    print("▶ Running: snapshot_fetcher")
+    with manifest.stage("snapshot_fetcher"):
+        run_id = snapshot_fetcher.fetch_snapshot()
+
+    manifest.data["run_id"] = run_id
+    manifest.out_dir = eval_dir(run_id)
+    with open(snapshot_dir(run_id) / "snapshot_meta.json") as f:
+        manifest.add_http("providers", json.load(f).get("fetch", {}))
+
+    frames, _ = run_pipeline(run_id, persist=persist, manifest=manifest)
+
+    print("▶ Running: collect_top10_marketcap")
+    with manifest.stage("collect_top10_marketcap", frame_rows({"top10": frames["top10"]})) as record:
+        # Kept with the run: latest_marketcaps.csv belongs to the
+        # ticks, which keep pricing the live run until continuity
+        caps = collect_top10_marketcap.collect(frames["top10"].to_dict("records"), run_id)
+        collect_top10_marketcap.write(caps, path=eval_dir(run_id) / CONTINUITY_CAPS)
+        record["rows_out"] = {"latest_marketcaps": len(caps)}
+    manifest.add_http("coingecko", collect_top10_marketcap.REQUEST_LOG)
+
+    print_timings(manifest.stages)
+    return run_id, frames, manifest.stages
+
+
+def print_timings(timings):
+    total = sum(t["seconds"] for t in timings)
+
+    print("\nStage timings:")
+    for t in timings:
+        print(f"  {t['stage']:<28} {t['seconds'] * 1000:10.1f} ms")
+    print(f"  {'total':<28} {total * 1000:10.1f} ms")
+
+
+# --------------------------------------------------
+# CLI: re-run selection over an existing snapshot (no network)
+#   python scripts/pipeline.py [run_id] [--no-persist]
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    persist = False if "--no-persist" in sys.argv else None
+
+    run_id = args[0] if args else current_run_id()
+    with RunManifest("pipeline", run_id, eval_dir(run_id)).recording() as manifest:
+        _, timings = run_pipeline(run_id, persist=persist, manifest=manifest)
+    print_timings(timings)
@@ -0,0 +1,108 @@
+import os
+import re
+
+import yaml
+
+from paths import PROVIDERS_CONFIG_FILE
+
+# --------------------------------------------------
+# Provider registry
+#
+# Every provider is declared in config/providers.yaml:
+#
+#   request:   params / headers of its one GET to api_url;
+#              "{top_n}" / "{vs_currency}" are filled from the
+#              provider entry, "{env:NAME}" from the environment
+#   records:   dotted path to the record list in the payload
+#              (omitted: the payload is the list)
+#   fields:    output column → dotted path inside a record, for
+#              symbol, market_cap, native_id and optionally
+#              name / slug
+#   select:    top_n  keep the top_n records by market cap
+#              (payloads that are the provider's whole universe)
+#
+# snapshot_fetcher.py builds its requests from "request" and
+# normalize.py extracts "fields" for any provider, so adding a
+# provider is a config entry plus, if its fields need more than
+# a path lookup, an adapter in ADAPTERS.
+# --------------------------------------------------
+
+# PROVIDERS_CONFIG lets a run point at a local stand-in
+# (see stub_provider_server.py) without touching config/.
+CONFIG_FILE = os.environ.get("PROVIDERS_CONFIG", PROVIDERS_CONFIG_FILE)
+
+REQUIRED_FIELDS = ["symbol", "market_cap", "native_id"]
+OPTIONAL_FIELDS = ["name", "slug"]
+
+PLACEHOLDER = re.compile(r"\{(env:)?(\w+)\}")
+
+
+def load_config(path=None):
+    with open(path or CONFIG_FILE) as f:
+        return yaml.safe_load(f)
+
+
+def load(path=None, cfg=None):
+    # → {name: provider entry}, in config order
+    cfg = cfg or load_config(path)
+    providers = {}
+    for p in cfg["providers"]:
+        missing = [k for k in REQUIRED_FIELDS if k not in (p.get("fields") or {})]
+        if missing:
+            raise RuntimeError(f"{p['name']}: fields must map {', '.join(missing)}")
+        providers[p["name"]] = p
+    return providers
+
+
+def enabled(providers):
+    return [p for p in providers.values() if p.get("enabled")]
+
+
+# --------------------------------------------------
+# Requests
+# --------------------------------------------------
+
+def fill(value, p):
+    if not isinstance(value, str):
+        return value
+
+    def resolve(m):
+        env, name = m.groups()
+        if env:
+            if not os.environ.get(name):
+                raise RuntimeError(f"{name} missing")
+            return os.environ[name]
+        return str(p[name])
+
+    # A lone "{top_n}" keeps the entry's own type
+    m = PLACEHOLDER.fullmatch(value)
+    if m and not m.group(1):
+        return p[m.group(2)]
+    return PLACEHOLDER.sub(resolve, value)
+
+
+def request_args(p):
+    # → (url, params, headers) of the provider's snapshot request
+    request = p.get("request") or {}
+    params = {k: fill(v, p) for k, v in (request.get("params") or {}).items()}
+    headers = {k: fill(v, p) for k, v in (request.get("headers") or {}).items()}
+    return p["api_url"], params or None, headers or None
+
+
+# --------------------------------------------------
+# Adapters: normalized frame → normalized frame
+# --------------------------------------------------
+
+def adapt_coinpaprika(df, p):
+    # Paprika ids are "<ticker>-<slug>"
+    prefix = (df["symbol"].str.lower() + "-").tolist()
+    df["slug"] = [
+        i[len(t):] if isinstance(i, str) and i.startswith(t) else i
+        for i, t in zip(df["native_id"], prefix)
+    ]
+    return df
+
+
+ADAPTERS = {
+    "coinpaprika": adapt_coinpaprika,
+}
@@ -0,0 +1,263 @@
+import argparse
+import bisect
+import hashlib
+import json
+from functools import lru_cache
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from datetime import datetime, timezone
+
+from history_store import HistoryStore, HISTORY_BIN
+from constituent_archive import ConstituentArchive
+import index_family
+import rollups
+
+# --------------------------------------------------
+# Local query service over the index history and the
+# constituent archive (optional; the dashboard keeps
+# reading the static files in docs/data/).
+#
+#   python scripts/query_server.py --port 8780
+#
+#   GET /history?from=2026-03-01&to=2026-03-08&resolution=1h
+#       [&index=INDEX-C20]                  (default: flagship)
+#   GET /constituents?from=...&to=...[&symbol=BTC&symbol=ETH]
+#   GET /latest[?index=...]
+#
+# from / to: ISO date-time (UTC if naive) or epoch seconds;
+# from is inclusive, to exclusive. resolution: 30m (raw ticks),
+# 1h, 1d, 1w (OHLC bars, same layout as the rollup tier files).
+# Flagship bars are served from the rollup tier files (every bar
+# overlapping the range); family indices have no rollups, so
+# their bars are aggregated from the raw ticks.
+#
+# Ranges are read by bisecting the memory-mapped stores, never
+# by scanning. Responses are cached in an LRU keyed on the query
+# and the store's size, so a new tick invalidates naturally, and
+# carry a strong ETag (If-None-Match → 304). The server never
+# writes: an index without a history store is a 404.
+# --------------------------------------------------
+
+CACHE_SIZE = 1024
+
+
+def parse_time(value):
+    if value is None:
+        return None
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value), timezone.utc)
+    t = datetime.fromisoformat(value)
+    return t if t.tzinfo else t.replace(tzinfo=timezone.utc)
+
+
+def family_names():
+    if not index_family.INDICES_DIR.exists():
+        return set()
+    return {p.name for p in index_family.INDICES_DIR.iterdir() if p.is_dir()}
+
+
+def history_path(index):
+    return HISTORY_BIN if index is None else index_family.index_dir(index) / "index_history.bin"
+
+
+def rollup_path(index, resolution):
+    # Tier file serving the query, or None (read the raw ticks)
+    if index is not None or rollups.TIERS.get(resolution) is None:
+        return None
+    path = rollups.tier_file(resolution)
+    return path if path.exists() else None
+
+
+def data_version(path):
+    # Stores are append-only: size + mtime identify their contents
+    if not path.exists():
+        return None
+    st = path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def archive_version(start, end):
+    parts = ConstituentArchive().partitions(start, end)
+    return tuple((p.name, data_version(p / "time.i64")) for p in parts)
+
+
+# --------------------------------------------------
+# Queries (pure functions of their arguments → cacheable)
+# --------------------------------------------------
+
+def open_history(index):
+    # Read-only: HistoryStore() would create a missing file
+    path = history_path(index)
+    if not path.exists():
+        raise LookupError(f"no history for index {index or rollups.SYMBOL}")
+    return HistoryStore(path=path, csv_path=None)
+
+
+@lru_cache(maxsize=len(rollups.TIERS))
+def load_tier(path, version):
+    with open(path) as f:
+        data = json.load(f)["data"]
+    return data, [bar[0] for bar in data]
+
+
+def query_rollup(path, start, end, seconds):
+    # Bars overlapping [start, end): bucket_start + seconds > start
+    data, times = load_tier(path, data_version(path))
+    lo = 0 if start is None else bisect.bisect_right(times, int(start.timestamp()) - seconds)
+    hi = len(data) if end is None else bisect.bisect_left(times, int(end.timestamp()))
+    return data[lo:hi]
+
+
+def query_history(index, start, end, resolution):
+    if resolution not in rollups.TIERS:
+        raise ValueError(f"resolution must be one of {', '.join(rollups.TIERS)}")
+
+    seconds = rollups.TIERS[resolution]
+    fields = ["time", "value"] if seconds is None else ["time", "open", "high", "low", "close"]
+    payload = {"index": index or rollups.SYMBOL, "resolution": resolution, "fields": fields}
+
+    path = rollup_path(index, resolution)
+    if path is not None:
+        return dict(payload, data=query_rollup(path, start, end, seconds))
+
+    rows = open_history(index).read_range(start, end)
+
+    data = []
+    for r in rows:
+        t = int(datetime.fromisoformat(r["timestamp_utc"]).timestamp())
+        value = round(r["index_value"], 6)
+
+        if seconds is None:
+            data.append([t, value])
+            continue
+
+        bucket = rollups.bucket_start(t, seconds)
+        if data and data[-1][0] == bucket:
+            bar = data[-1]
+            bar[2] = max(bar[2], value)
+            bar[3] = min(bar[3], value)
+            bar[4] = value
+        else:
+            data.append([bucket, value, value, value, value])
+
+    return dict(payload, data=data)
+
+
+def query_constituents(symbols, start, end):
+    df = ConstituentArchive().scan(symbols, start, end)
+    return {
+        "fields": ["time", "symbol", "weight", "market_cap", "run_id"],
+        "data": [
+            [int(t.timestamp()), s, w, c, r]
+            for t, s, w, c, r in zip(
+                df["timestamp_utc"], df["symbol"], df["weight"], df["market_cap"], df["run_id"]
+            )
+        ],
+    }
+
+
+def query_latest(index):
+    return {"index": index or rollups.SYMBOL, "latest": open_history(index).last()}
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def cached_response(route, key, version):
+    # version is part of the key only: a changed store misses
+    if route == "history":
+        index, start, end, resolution = key
+        payload = query_history(index, start, end, resolution)
+    elif route == "constituents":
+        symbols, start, end = key
+        payload = query_constituents(list(symbols) if symbols else None, start, end)
+    else:
+        payload = query_latest(key[0])
+
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+    return body, etag
+
+
+def resolve(route, query):
+    # → (cache key, data version) for a request
+    def one(name, default=None):
+        return query.get(name, [default])[0]
+
+    index = one("index")
+    if index is not None and index not in family_names():
+        raise LookupError(f"unknown index {index}")
+
+    start, end = parse_time(one("from")), parse_time(one("to"))
+
+    if route == "history":
+        key = (index, start, end, one("resolution", "30m"))
+        path = rollup_path(index, key[3]) or history_path(index)
+    elif route == "constituents":
+        symbols = tuple(sorted(query["symbol"])) if "symbol" in query else None
+        return (symbols, start, end), archive_version(start, end)
+    elif route == "latest":
+        key, path = (index,), history_path(index)
+    else:
+        raise LookupError(f"no route /{route}")
+
+    version = data_version(path)
+    if version is None:
+        raise LookupError(f"no history for index {index or rollups.SYMBOL}")
+    return key, version
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep-alive: internal consumers reuse one connection. Headers
+    # and body go out in separate writes, so Nagle must be off or
+    # every response waits on the client's delayed ACK (~40 ms).
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        route = url.path.strip("/")
+
+        try:
+            key, version = resolve(route, parse_qs(url.query))
+            body, etag = cached_response(route, key, version)
+        except LookupError as e:
+            return self.reply(404, json.dumps({"error": str(e)}).encode())
+        except ValueError as e:
+            return self.reply(400, json.dumps({"error": str(e)}).encode())
+
+        if self.headers.get("If-None-Match") == etag:
+            return self.reply(304, b"", etag)
+        self.reply(200, body, etag)
+
+    def reply(self, status, body, etag=None):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-cache")
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(host="127.0.0.1", port=8780):
+    return ThreadingHTTPServer((host, port), Handler)
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8780)
+    args = ap.parse_args()
+
+    server = serve(args.host, args.port)
+    print(f"▶ Serving index queries at http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        info = cached_response.cache_info()
+        print(f"Cache: {info.hits} hits, {info.misses} misses")
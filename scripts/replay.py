@@ -0,0 +1,93 @@
+import argparse
+import contextlib
+import io
+import re
+import yaml
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from paths import SNAPSHOTS_DIR, EVAL_ROOT, ENGINE_CONFIG_FILE
+
+# --------------------------------------------------
+# Historical replay of the ARES pipeline
+#
+# Re-runs normalize → consensus → exclusions → rank over archived
+# snapshots/<run_id>/ payloads in a process pool and writes one
+# consolidated top-10 table. Read-only: no network, no writes to
+# CURRENT_RUN.txt or ares_eval/<run_id>/.
+#
+#   python scripts/replay.py --from 2026-02-01 --to 2026-03-01 \
+#       --config /tmp/engine_variant.yaml --out /tmp/replay.csv
+# --------------------------------------------------
+
+RUN_ID_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}-\d{2}Z$")
+DEFAULT_OUT = EVAL_ROOT / "replay_top10.csv"
+
+
+def archived_runs(start=None, end=None):
+    # start / end: date or run_id prefixes, both inclusive
+    runs = sorted(
+        p.name for p in SNAPSHOTS_DIR.iterdir()
+        if p.is_dir() and RUN_ID_RE.match(p.name)
+    )
+    if start:
+        runs = [r for r in runs if r >= start]
+    if end:
+        runs = [r for r in runs if r[:len(end)] <= end]
+    return runs
+
+
+def replay_run(run_id, cfg):
+    # Runs in a worker process; pipeline output is captured, not printed
+    from pipeline import run_pipeline
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            frames, timings = run_pipeline(run_id, persist=False, cfg=cfg, readonly=True)
+    except Exception as e:
+        return run_id, None, f"{type(e).__name__}: {e}"
+
+    top10 = frames["top10"].copy()
+    top10.insert(0, "run_id", run_id)
+    return run_id, top10, None
+
+
+def replay(runs, cfg, workers=None):
+    results = []
+    errors = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for run_id, top10, error in pool.map(replay_run, runs, [cfg] * len(runs)):
+            if error:
+                errors[run_id] = error
+            else:
+                results.append(top10)
+
+    table = (
+        pd.concat(results, ignore_index=True)
+        if results
+        else pd.DataFrame(columns=["run_id", "symbol", "entry_market_cap", "rank", "weight"])
+    )
+    return table, errors
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--from", dest="start", help="first run (date or run_id prefix)")
+    ap.add_argument("--to", dest="end", help="last run (date or run_id prefix)")
+    ap.add_argument("--config", default=str(ENGINE_CONFIG_FILE), help="engine.yaml to evaluate")
+    ap.add_argument("--workers", type=int, default=None)
+    ap.add_argument("--out", default=str(DEFAULT_OUT))
+    args = ap.parse_args()
+
+    cfg = yaml.safe_load(Path(args.config).read_text())
+    runs = archived_runs(args.start, args.end)
+    print(f"Replaying {len(runs)} archived snapshots...")
+
+    table, errors = replay(runs, cfg, args.workers)
+    table.to_csv(args.out, index=False)
+
+    for run_id, error in errors.items():
+        print(f"✖ {run_id}: {error}")
+    print(f"Replayed {len(runs) - len(errors)}/{len(runs)} runs → {args.out}")
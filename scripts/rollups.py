@@ -0,0 +1,224 @@
+import json
+import os
+from pathlib import Path
+from datetime import datetime
+
+from history_store import HistoryStore
+import tick_log
+
+# --------------------------------------------------
+# Multi-resolution dashboard timeseries
+#
+# One compact JSON file per tier in docs/data/:
+#
+#   index_30m.json  raw ticks      data: [[time, value], ...]
+#   index_1h.json   hourly OHLC    data: [[time, open, high, low, close], ...]
+#   index_1d.json   daily OHLC
+#   index_1w.json   weekly OHLC (weeks start Monday 00:00 UTC)
+#
+# time is epoch seconds (UTC, bucket start for OHLC tiers).
+# Every file ends in "]}" so a tick either appends one element
+# in front of it or rewrites only the still-open last bar:
+# O(1) per tick regardless of history length. Byte offsets
+# of the last element live in index_data/rollups_state.json;
+# index_rollups.json is the manifest the dashboard reads to
+# pick a resolution.
+#
+# A rebuild reads the tick log, not the history store: legacy
+# points that only have an index value (no raw value) never
+# reached the store but belong in every tier.
+# --------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DOCS_DATA_DIR = BASE_DIR / "docs" / "data"
+STATE_FILE = BASE_DIR / "index_data" / "rollups_state.json"
+MANIFEST = DOCS_DATA_DIR / "index_rollups.json"
+
+SYMBOL = "CRYP_INDEX"
+WEEK_ORIGIN = 4 * 86400  # 1970-01-05, the first Monday after the epoch
+
+# name -> bucket seconds (None = raw points)
+TIERS = {
+    "30m": None,
+    "1h": 3600,
+    "1d": 86400,
+    "1w": 7 * 86400,
+}
+
+TAIL = b"]}"
+
+
+def tier_file(name):
+    return DOCS_DATA_DIR / f"index_{name}.json"
+
+
+def bucket_start(t, seconds):
+    origin = WEEK_ORIGIN if seconds == TIERS["1w"] else 0
+    return (t - origin) // seconds * seconds + origin
+
+
+def header(name):
+    fields = ["time", "value"] if TIERS[name] is None else ["time", "open", "high", "low", "close"]
+    head = {"symbol": SYMBOL, "interval": name, "fields": fields}
+    # '{"symbol":...,"fields":[...],"data":['
+    return (json.dumps(head, separators=(",", ":"))[:-1] + ',"data":[').encode()
+
+
+def encode(element):
+    return json.dumps(element, separators=(",", ":")).encode()
+
+
+# --------------------------------------------------
+# State
+# --------------------------------------------------
+
+def load_state():
+    if not STATE_FILE.exists():
+        return None
+    with open(STATE_FILE) as f:
+        state = json.load(f)
+
+    # Any tier file out of step with the state (crash, manual edit)
+    # forces a rebuild from the history store
+    for name in TIERS:
+        tier = state.get(name)
+        path = tier_file(name)
+        if not tier or not path.exists() or path.stat().st_size != tier["size"]:
+            return None
+    return state
+
+
+def save_state(state):
+    tmp = STATE_FILE.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_FILE)
+
+
+def write_manifest(state, last_updated):
+    manifest = {
+        "symbol": SYMBOL,
+        "last_updated": last_updated,
+        "tiers": {
+            name: {
+                "file": tier_file(name).name,
+                "points": state[name]["count"],
+                "from": state[name]["first"],
+                "to": state[name]["last"],
+            }
+            for name in TIERS
+        },
+    }
+    with open(MANIFEST, "w") as f:
+        json.dump(manifest, f, separators=(",", ":"))
+
+
+# --------------------------------------------------
+# Incremental update
+# --------------------------------------------------
+
+def _append(path, tier, element):
+    with open(path, "r+b") as f:
+        f.seek(tier["size"] - len(TAIL))
+        if tier["count"]:
+            f.write(b",")
+        tier["offset"] = f.tell()
+        f.write(encode(element) + TAIL)
+        tier["size"] = f.tell()
+    tier["count"] += 1
+
+
+def _rewrite_last(path, tier, element):
+    with open(path, "r+b") as f:
+        f.seek(tier["offset"])
+        f.write(encode(element) + TAIL)
+        tier["size"] = f.tell()
+        f.truncate()
+
+
+def update_tier(name, tier, t, value):
+    seconds = TIERS[name]
+    path = tier_file(name)
+
+    if seconds is None:
+        _append(path, tier, [t, value])
+    else:
+        start = bucket_start(t, seconds)
+        bar = tier.get("bar")
+        if bar and bar[0] == start:
+            bar[2] = max(bar[2], value)
+            bar[3] = min(bar[3], value)
+            bar[4] = value
+            _rewrite_last(path, tier, bar)
+        else:
+            bar = [start, value, value, value, value]
+            tier["bar"] = bar
+            _append(path, tier, bar)
+        t = start
+
+    if tier["first"] is None:
+        tier["first"] = t
+    tier["last"] = t
+
+
+def update(timestamp, index_value):
+    # Called once per tick after the history row is persisted
+    state = load_state()
+    if state is None:
+        # First run (or inconsistent files): rebuild every tier from
+        # the full tick log, which already contains this tick
+        rebuild()
+        return
+
+    t = int(datetime.fromisoformat(timestamp).timestamp())
+    value = round(float(index_value), 6)
+
+    for name in TIERS:
+        update_tier(name, state[name], t, value)
+
+    save_state(state)
+    write_manifest(state, timestamp)
+
+
+# --------------------------------------------------
+# Full rebuild from index_history
+# --------------------------------------------------
+
+def history_points():
+    # → [(timestamp, index_value)], oldest first
+    if tick_log.load_head() is not None:
+        return [(r["t"], r["value"]) for r in tick_log.read() if r.get("value") is not None]
+    # Not migrated to the tick log yet
+    return [(r["timestamp_utc"], r["index_value"]) for r in HistoryStore().read_range()]
+
+
+def rebuild(points=None):
+    points = history_points() if points is None else points
+
+    state = {}
+    for name in TIERS:
+        path = tier_file(name)
+        path.write_bytes(header(name) + TAIL)
+        state[name] = {
+            "size": path.stat().st_size,
+            "count": 0,
+            "offset": None,
+            "first": None,
+            "last": None,
+        }
+
+    for timestamp, index_value in points:
+        t = int(datetime.fromisoformat(timestamp).timestamp())
+        value = round(float(index_value), 6)
+        for name in TIERS:
+            update_tier(name, state[name], t, value)
+
+    save_state(state)
+    write_manifest(state, points[-1][0] if points else None)
+    return state
+
+
+if __name__ == "__main__":
+    state = rebuild()
+    for name in TIERS:
+        print(f"{name:>4}: {state[name]['count']} points → {tier_file(name)}")
@@ -1,5 +1,3 @@
-import subprocess
-import sys
 import json
 import hashlib
 import os
@@ -7,7 +5,6 @@ import yaml
 from pathlib import Path
 from datetime import datetime, timezone
 
-PY = sys.executable
 BASE = Path(__file__).resolve().parent.parent
 
 INDEX_DATA = BASE / "index_data"
@@ -16,23 +13,8 @@ INDEX_DATA.mkdir(exist_ok=True)
 EMERGENCY_LOCK = INDEX_DATA / "emergency.lock"
 EMERGENCY_LOG = INDEX_DATA / "emergency_events.jsonl"
 
-STATE_FILE = INDEX_DATA / "index_state.json"
-HISTORY_FILE = INDEX_DATA / "index_history.csv"
-MARKETCAP_FILE = INDEX_DATA / "latest_marketcaps.csv"
-
 HUMAN_OVERRIDE = BASE / "ares/exclusions/human_override.yaml"
 
-STEPS = [
-    "scripts/snapshot_fetcher.py",
-    "scripts/normalize_coingecko.py",
-    "scripts/normalize_coinmarketcap.py",
-    "scripts/normalize_coinpaprika.py",
-    "scripts/build_presence_matrix.py",
-    "scripts/apply_quorum.py",
-    "scripts/apply_marketcap_tolerance.py",
-    "scripts/apply_exclu_weight_rank.py",
-]
-
 # --------------------------------------------------
 # Helpers
 # --------------------------------------------------
@@ -103,28 +85,24 @@ def run():
     print("Affected symbols:", ", ".join(affected_symbols))
 
     # --------------------------------------------------
-    # Full rebalance pipeline (no time window, no lock)
+    # Full rebalance pipeline (no time window, no lock),
+    # including market caps for continuity — in-process
     # --------------------------------------------------
 
-    for step in STEPS:
-        print(f"▶ Running: {step}")
-        subprocess.run([PY, step], check=True)
+    from pipeline import run_full
+    from run_manifest import RunManifest
 
-    # --------------------------------------------------
-    # Collect market caps for continuity
-    # --------------------------------------------------
+    with RunManifest("emergency_adjustment").recording() as manifest:
+        run_id, _, _ = run_full(manifest)
 
-    subprocess.run(
-        [PY, "scripts/collect_top10_marketcap.py"],
-        check=True
-    )
+        # --------------------------------------------------
+        # Apply continuity
+        # --------------------------------------------------
 
-    # --------------------------------------------------
-    # Apply continuity
-    # --------------------------------------------------
+        from run_rebalance import apply_continuity
 
-    from run_rebalance import apply_continuity
-    apply_continuity()
+        with manifest.stage("apply_continuity"):
+            apply_continuity(run_id)
 
     # --------------------------------------------------
     # Audit log
@@ -0,0 +1,167 @@
+import json
+import os
+import resource
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from datetime import datetime, timezone
+
+# --------------------------------------------------
+# Per-run execution manifest
+#
+# One record per stage: UTC start/end, wall and CPU seconds
+# (own + child processes), peak RSS so far, rows in/out and
+# bytes read/written (Linux /proc/self/io, else null).
+# HTTP latencies of the run are attached under "http".
+#
+# Opt-in profiling of a single stage, without editing scripts:
+#   ARES_PROFILE_STAGE=consensus              → <dir>/consensus.prof (cProfile)
+#   ARES_PROFILE_STAGE=consensus ARES_PROFILE=tracemalloc
+#                                             → <dir>/consensus.tracemalloc.txt
+# --------------------------------------------------
+
+PROC_IO = Path("/proc/self/io")
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def io_counters():
+    if not PROC_IO.exists():
+        return None
+    counters = {}
+    for line in PROC_IO.read_text().splitlines():
+        key, _, value = line.partition(":")
+        counters[key] = int(value)
+    return counters["rchar"], counters["wchar"]
+
+
+def cpu_seconds():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def peak_rss_kb():
+    return max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+    )
+
+
+def frame_rows(frames):
+    return {name: len(df) for name, df in (frames or {}).items()}
+
+
+class RunManifest:
+    def __init__(self, kind, run_id=None, out_dir=None, filename="run_manifest.json"):
+        self.out_dir = Path(out_dir) if out_dir else None
+        self.filename = filename
+        self.data = {
+            "kind": kind,
+            "run_id": run_id,
+            "pid": os.getpid(),
+            "started_at": utc_now(),
+            "finished_at": None,
+            "status": "running",
+            "stages": [],
+            "http": {},
+        }
+        self.profile_stage = os.environ.get("ARES_PROFILE_STAGE")
+        self.profile_mode = os.environ.get("ARES_PROFILE", "cprofile")
+
+    @property
+    def stages(self):
+        return self.data["stages"]
+
+    @contextmanager
+    def stage(self, name, rows_in=None):
+        record = {
+            "stage": name,
+            "started_at": utc_now(),
+            "rows_in": rows_in,
+            "rows_out": None,
+        }
+        io_start = io_counters()
+        cpu_start = cpu_seconds()
+        start = time.perf_counter()
+
+        with self._profile(name, record):
+            try:
+                yield record
+            except Exception as e:
+                record["error"] = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                io_end = io_counters()
+                record.update({
+                    "finished_at": utc_now(),
+                    "seconds": time.perf_counter() - start,
+                    "cpu_seconds": round(cpu_seconds() - cpu_start, 4),
+                    "peak_rss_kb": peak_rss_kb(),
+                    "bytes_read": io_end[0] - io_start[0] if io_start else None,
+                    "bytes_written": io_end[1] - io_start[1] if io_start else None,
+                })
+                self.stages.append(record)
+
+    @contextmanager
+    def _profile(self, name, record):
+        if name != self.profile_stage or self.out_dir is None:
+            yield
+            return
+
+        if self.profile_mode == "tracemalloc":
+            import tracemalloc
+
+            tracemalloc.start(25)
+            try:
+                yield
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                path = self.out_dir / f"{name}.tracemalloc.txt"
+                with open(path, "w") as f:
+                    f.write(f"peak traced bytes: {peak}\n")
+                    for s in snapshot.statistics("lineno")[:50]:
+                        f.write(f"{s}\n")
+                record["profile"] = str(path)
+        else:
+            import cProfile
+
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                path = self.out_dir / f"{name}.prof"
+                profiler.dump_stats(path)
+                record["profile"] = str(path)
+
+    @contextmanager
+    def recording(self):
+        # Writes the manifest when the run ends, including failed runs
+        try:
+            yield self
+        except BaseException:
+            if self.out_dir is not None:
+                self.write(status="error")
+            raise
+        self.write()
+
+    def add_http(self, source, stats):
+        self.data["http"][source] = stats
+
+    def write(self, path=None, status="ok"):
+        self.data["finished_at"] = utc_now()
+        self.data["status"] = status
+        self.data["total_seconds"] = sum(s["seconds"] for s in self.stages)
+
+        path = Path(path) if path else self.out_dir / self.filename
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.data, f, indent=2)
+        os.replace(tmp, path)
+        return path
@@ -1,5 +1,3 @@
-import subprocess
-import sys
 import json
 import os
 import yaml
@@ -10,7 +8,6 @@ from datetime import datetime, timezone, timedelta
 # Runtime
 # --------------------------------------------------
 
-PY = sys.executable
 BASE = Path(__file__).resolve().parent.parent
 
 # --------------------------------------------------
@@ -25,39 +22,11 @@ INDEX_DATA = BASE / "index_data"
 INDEX_DATA.mkdir(exist_ok=True)
 
 LOCK_FILE = INDEX_DATA / "rebalance.lock"
-STATE_FILE = INDEX_DATA / "index_state.json"
-HISTORY_FILE = INDEX_DATA / "index_history.csv"
-MARKETCAP_FILE = INDEX_DATA / "latest_marketcaps.csv"
 
 ARES_EXCLUSIONS = BASE / "ares" / "exclusions"
 HUMAN_OVERRIDE = ARES_EXCLUSIONS / "human_override.yaml"
 EXCLUSIONS = ARES_EXCLUSIONS / "exclusions.yaml"
 
-STEPS = [
-    "scripts/snapshot_fetcher.py",
-    "scripts/normalize_coingecko.py",
-    "scripts/normalize_coinmarketcap.py",
-    "scripts/normalize_coinpaprika.py",
-    "scripts/build_presence_matrix.py",
-    "scripts/apply_quorum.py",
-    "scripts/apply_marketcap_tolerance.py",
-    "scripts/apply_exclu_weight_rank.py",
-]
-
-
-# --------------------------------------------------
-
-from datetime import datetime, timezone
-
-now = datetime.now(timezone.utc)
-if now.minute in (0, 30):
-    print("Unsafe minute (:00 or :30). Skipping rebalance.")
-    exit(0)
-
-# --------------------------------------------------
-
-
-
 # --------------------------------------------------
 # Guards
 # --------------------------------------------------
@@ -146,36 +115,52 @@ def consolidate_emergency_overrides():
 # Continuity logic
 # --------------------------------------------------
 
-def apply_continuity():
-    if not STATE_FILE.exists() or not HISTORY_FILE.exists():
-        print("No existing index state found — skipping continuity (index launch).")
-        return
-
-    import pandas as pd
-
-    old_index_value = (
-        pd.read_csv(HISTORY_FILE)
-        .iloc[-1]["index_value"]
-    )
-
-    caps = pd.read_csv(MARKETCAP_FILE)
-    new_raw_value = (caps["weight"] * caps["market_cap"]).sum()
-
-    new_divisor = new_raw_value / old_index_value
-
-    with open(STATE_FILE) as f:
-        state = json.load(f)
-
-    state["divisor"] = new_divisor
-    state["last_rebalance_at"] = datetime.now(timezone.utc).isoformat()
-
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
+def apply_continuity(run_id):
+    # Runs any time: ticks keep pricing the live run until the
+    # state pointer flips to run_id under the index lease
+    import csv
+    import coordination
+    import tick_log
+    import index_math
+    from pipeline import CONTINUITY_CAPS
+
+    with open(BASE / "ares_eval" / run_id / CONTINUITY_CAPS, newline="") as f:
+        new_raw_value = index_math.raw_value(list(csv.DictReader(f)))
+
+    with coordination.lease("index", "rebalance"):
+        # Finish any tick that died after its journal write, so the
+        # last history row is the last tick
+        tick_log.recover()
+
+        state = coordination.read_state()
+        if state is None:
+            # Index launch: the first tick creates the pointer for
+            # the run in CURRENT_RUN.txt
+            print("No existing index state found — skipping continuity (index launch).")
+            return
+
+        # The committed journal, not the derived history store: the
+        # latter is missing wherever it was never rebuilt
+        last = tick_log.last_value()
+        if last is None:
+            raise RuntimeError(
+                f"Index state exists (run {state['run_id']}) but the tick log has no index value"
+            )
+
+        old_index_value = last["value"]
+        new_divisor = new_raw_value / old_index_value
+
+        state = coordination.new_state(
+            state, run_id, new_divisor,
+            last_rebalance_at=datetime.now(timezone.utc).isoformat(),
+        )
+        coordination.publish_state(state)
 
     print("\nRebalance continuity applied")
     print(f"Old index value : {old_index_value}")
     print(f"New raw value   : {new_raw_value}")
     print(f"New divisor     : {new_divisor}")
+    print(f"State version   : {state['version']} (run {run_id})")
 
 # --------------------------------------------------
 # Main
@@ -192,16 +177,17 @@ def run():
     # 🔑 Consolidation happens ONLY if blacklist still exists
     consolidate_emergency_overrides()
 
-    for step in STEPS:
-        print(f"▶ Running: {step}")
-        subprocess.run([PY, step], check=True)
+    # Snapshot, selection and continuity market caps run in-process;
+    # ares_eval/<run_id>/run_manifest.json records every stage
+    from pipeline import run_full
+    from run_manifest import RunManifest
 
-    print("▶ Collecting market caps for continuity")
-    subprocess.run([PY, "scripts/collect_top10_marketcap.py"], check=True)
+    with RunManifest("rebalance").recording() as manifest:
+        run_id, _, _ = run_full(manifest)
 
-    apply_continuity()
+        with manifest.stage("apply_continuity"):
+            apply_continuity(run_id)
 
-    run_id = (BASE / "CURRENT_RUN.txt").read_text().strip()
     write_lock(run_id, now)
 
     print("\n==============================")
@@ -1,77 +1,188 @@
 from paths import snapshot_dir, eval_dir
+import snapshot_store
+import provider_registry
 import json
 import requests
-import yaml
-import os
+import time
+import threading
 from pathlib import Path
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 
 BASE_DIR = Path(__file__).resolve().parent.parent
-CFG = yaml.safe_load(open(BASE_DIR / "config/providers.yaml"))
-
-RUN_ID = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%MZ")
-(BASE_DIR / "CURRENT_RUN.txt").write_text(RUN_ID)
-
-SNAPSHOT_DIR = snapshot_dir(RUN_ID)
-eval_dir(RUN_ID)
-
-meta = {"run_id": RUN_ID, "providers": {}}
-
-
-def fetch_coingecko(p):
-    r = requests.get(
-        p["api_url"],
-        params={
-            "vs_currency": p["vs_currency"],
-            "order": "market_cap_desc",
-            "per_page": p["top_n"],
-            "page": 1
-        },
-        timeout=30
-    )
-    r.raise_for_status()
-    return r.json()
-
-def fetch_coinmarketcap(p):
-    key = os.environ.get("CMC_API_KEY")
-    if not key:
-        raise RuntimeError("CMC_API_KEY missing")
-    r = requests.get(
-        p["api_url"],
-        headers={"X-CMC_PRO_API_KEY": key},
-        params={"limit": p["top_n"], "convert": p["vs_currency"]},
-        timeout=30
-    )
-    r.raise_for_status()
-    return r.json()
-
-def fetch_coinpaprika(p):
-    r = requests.get(p["api_url"], timeout=30)
-    r.raise_for_status()
-    return r.json()
-
-for p in CFG["providers"]:
-    if not p.get("enabled"):
-        continue
+
+CFG = provider_registry.load_config()
+
+FETCH_DEFAULTS = {
+    "concurrent": True,
+    "timeout_seconds": 30,
+    "retries": 2,
+    "backoff_seconds": 1.0,
+    "deadline_seconds": 90,
+}
+
+
+# --------------------------------------------------
+# HTTP: one pooled session per provider host
+# --------------------------------------------------
+
+class HostSessions:
+    def __init__(self):
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        host = urlsplit(url).netloc
+        with self.lock:
+            if host not in self.sessions:
+                s = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=4)
+                s.mount("http://", adapter)
+                s.mount("https://", adapter)
+                self.sessions[host] = s
+            return self.sessions[host]
+
+    def close(self):
+        for s in self.sessions.values():
+            s.close()
+
+
+class Http:
+    # Bound to one provider: retries with exponential backoff and never
+    # waits past the snapshot-wide deadline. Records latency/bytes.
+    def __init__(self, sessions, fetch_cfg, deadline):
+        self.sessions = sessions
+        self.cfg = fetch_cfg
+        self.deadline = deadline
+        self.stats = {"attempts": 0, "bytes": 0, "latency_ms": None, "status_code": None}
+
+    def get_json(self, url, params=None, headers=None):
+        session = self.sessions.get(url)
+        last_error = None
+
+        for attempt in range(self.cfg["retries"] + 1):
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            self.stats["attempts"] += 1
+            start = time.perf_counter()
+            try:
+                r = session.get(
+                    url,
+                    params=params,
+                    headers=headers,
+                    timeout=min(self.cfg["timeout_seconds"], remaining),
+                )
+                self.stats["latency_ms"] = round((time.perf_counter() - start) * 1000, 1)
+                self.stats["status_code"] = r.status_code
+                r.raise_for_status()
+                self.stats["bytes"] = len(r.content)
+                return r.json()
+            except (requests.RequestException, ValueError) as e:
+                last_error = e
+                # 4xx (except 429) will not get better on retry
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if status is not None and 400 <= status < 500 and status != 429:
+                    break
+
+            backoff = self.cfg["backoff_seconds"] * (2 ** attempt)
+            if time.monotonic() + backoff >= self.deadline:
+                break
+            time.sleep(backoff)
+
+        if last_error is None:
+            raise RuntimeError("snapshot deadline exceeded")
+        raise last_error
+
+
+# --------------------------------------------------
+# Providers
+# --------------------------------------------------
+
+def fetch(p, http):
+    # Request shape declared in providers.yaml (provider_registry.py)
+    url, params, headers = provider_registry.request_args(p)
+    return http.get_json(url, params=params, headers=headers)
+
+
+def fetch_provider(p, sessions, fetch_cfg, deadline):
+    http = Http(sessions, fetch_cfg, deadline)
+    start = time.perf_counter()
+    ref = None
     try:
-        if p["name"] == "coingecko":
-            data = fetch_coingecko(p)
-        elif p["name"] == "coinmarketcap":
-            data = fetch_coinmarketcap(p)
-        elif p["name"] == "coinpaprika":
-            data = fetch_coinpaprika(p)
-        else:
-            continue
+        data = fetch(p, http)
+
+        if time.monotonic() > deadline:
+            raise RuntimeError("snapshot deadline exceeded")
 
-        with open(SNAPSHOT_DIR / f"{p['name']}.json", "w") as f:
-            json.dump(data, f)
+        # Compressed, content-addressed; the run keeps only the hash
+        ref = snapshot_store.put(data)
 
-        meta["providers"][p["name"]] = "success"
+        status = "success"
     except Exception as e:
-        meta["providers"][p["name"]] = f"error: {e}"
+        status = f"error: {e}"
+
+    http.stats["total_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    return status, http.stats, ref
+
+
+# --------------------------------------------------
+# Snapshot
+# --------------------------------------------------
+
+def fetch_snapshot(run_id=None, cfg=None):
+    cfg = cfg or CFG
+    fetch_cfg = {**FETCH_DEFAULTS, **(cfg.get("fetch") or {})}
+
+    RUN_ID = run_id or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%MZ")
+    (BASE_DIR / "CURRENT_RUN.txt").write_text(RUN_ID)
+
+    SNAPSHOT_DIR = snapshot_dir(RUN_ID)
+    eval_dir(RUN_ID)
+
+    meta = {"run_id": RUN_ID, "providers": {}, "payloads": {}, "fetch": {}}
+
+    providers = provider_registry.enabled(provider_registry.load(cfg=cfg))
+
+    started = time.perf_counter()
+    deadline = time.monotonic() + fetch_cfg["deadline_seconds"]
+    sessions = HostSessions()
+    workers = len(providers) if fetch_cfg["concurrent"] else 1
+
+    pool = ThreadPoolExecutor(max_workers=max(workers, 1))
+    futures = {
+        p["name"]: pool.submit(fetch_provider, p, sessions, fetch_cfg, deadline)
+        for p in providers
+    }
+    wait(futures.values(), timeout=max(deadline - time.monotonic(), 0))
+
+    for name, fut in futures.items():
+        if fut.done():
+            status, stats, ref = fut.result()
+        else:
+            fut.cancel()
+            status, stats, ref = "error: snapshot deadline exceeded", {}, None
+        meta["providers"][name] = status
+        if ref:
+            meta["payloads"][name] = ref
+        meta["fetch"][name] = stats
+
+    # Stragglers past the deadline are abandoned, not awaited
+    pool.shutdown(wait=False, cancel_futures=True)
+    sessions.close()
+
+    meta["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+    with open(SNAPSHOT_DIR / "snapshot_meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+    print("Snapshot locked:", RUN_ID)
+    print("Provider status:", meta["providers"])
+    print(f"Fetched {len(providers)} providers in {meta['elapsed_ms']} ms")
+    return RUN_ID
 
-with open(SNAPSHOT_DIR / "snapshot_meta.json", "w") as f:
-    json.dump(meta, f, indent=2)
 
-print("Snapshot locked:", RUN_ID)
-print("Provider status:", meta["providers"])
+if __name__ == "__main__":
+    fetch_snapshot()
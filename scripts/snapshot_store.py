@@ -0,0 +1,133 @@
+import hashlib
+import json
+import lzma
+import os
+import sys
+from pathlib import Path
+
+from paths import SNAPSHOTS_DIR
+
+# --------------------------------------------------
+# Content-addressed snapshot store
+#
+# Provider payloads are stored once, xz-compressed, under
+#   snapshots/objects/<sha256[:2]>/<sha256>.json.xz
+# keyed by the sha256 of the uncompressed JSON bytes. A run
+# directory keeps only snapshot_meta.json, whose "payloads"
+# block maps each provider to its hash:
+#
+#   "payloads": {"coinpaprika": {"sha256": "…", "bytes": 1525569,
+#                                "stored_bytes": 207680}}
+#
+# Runs archived before the store (snapshots/<run_id>/<provider>.json)
+# are still read as-is; migrate them with
+#   python scripts/snapshot_store.py migrate [run_id ...]
+# --------------------------------------------------
+
+OBJECTS_DIR = SNAPSHOTS_DIR / "objects"
+META_FILE = "snapshot_meta.json"
+
+
+def object_path(sha256):
+    return OBJECTS_DIR / sha256[:2] / f"{sha256}.json.xz"
+
+
+def put_bytes(raw):
+    sha256 = hashlib.sha256(raw).hexdigest()
+    path = object_path(sha256)
+
+    # Identical payloads (same bytes) are written once
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_bytes(lzma.compress(raw))
+        os.replace(tmp, path)
+
+    return {
+        "sha256": sha256,
+        "bytes": len(raw),
+        "stored_bytes": path.stat().st_size,
+    }
+
+
+def put(data):
+    return put_bytes(json.dumps(data).encode())
+
+
+def load_meta(snap):
+    path = Path(snap) / META_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def payload_ref(snap, provider):
+    ref = load_meta(snap).get("payloads", {}).get(provider)
+    if ref is None:
+        raise FileNotFoundError(f"No {provider} payload in snapshot {snap}")
+    return ref
+
+
+def open_payload(snap, provider):
+    # Text stream over one provider payload, archived or legacy
+    legacy = Path(snap) / f"{provider}.json"
+    if legacy.exists():
+        return open(legacy, "r")
+    return lzma.open(object_path(payload_ref(snap, provider)["sha256"]), "rt")
+
+
+def read_payload(snap, provider):
+    legacy = Path(snap) / f"{provider}.json"
+    if legacy.exists():
+        return legacy.read_bytes()
+    return lzma.decompress(object_path(payload_ref(snap, provider)["sha256"]).read_bytes())
+
+
+def has_payload(snap, provider):
+    return (
+        (Path(snap) / f"{provider}.json").exists()
+        or provider in load_meta(snap).get("payloads", {})
+    )
+
+
+# --------------------------------------------------
+# Migration of legacy run directories
+# --------------------------------------------------
+
+def migrate(run_id):
+    snap = SNAPSHOTS_DIR / run_id
+    meta = load_meta(snap)
+    payloads = meta.setdefault("payloads", {})
+
+    legacy = sorted(p for p in snap.glob("*.json") if p.name != META_FILE)
+    for path in legacy:
+        # Original bytes are kept, so the run replays bit-for-bit
+        payloads[path.stem] = put_bytes(path.read_bytes())
+
+    tmp = snap / f"{META_FILE}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, snap / META_FILE)
+
+    # Only drop the raw files once the manifest points at the objects
+    for path in legacy:
+        path.unlink()
+
+    return payloads
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] != ["migrate"]:
+        raise SystemExit("usage: snapshot_store.py migrate [run_id ...]")
+
+    run_ids = sys.argv[2:] or sorted(
+        p.name for p in SNAPSHOTS_DIR.iterdir()
+        if p.is_dir() and p != OBJECTS_DIR
+    )
+
+    for run_id in run_ids:
+        payloads = migrate(run_id)
+        raw = sum(r["bytes"] for r in payloads.values())
+        stored = sum(r["stored_bytes"] for r in payloads.values())
+        print(f"▶ {run_id}: {len(payloads)} payloads, {raw} → {stored} bytes")
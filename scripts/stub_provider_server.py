@@ -0,0 +1,124 @@
+import argparse
+import json
+import time
+import yaml
+from pathlib import Path
+from urllib.parse import urlsplit, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from paths import SNAPSHOTS_DIR
+from snapshot_store import read_payload, has_payload
+
+# --------------------------------------------------
+# Local stand-in for the provider APIs
+#
+# Serves the payloads of snapshots/<run_id>/ at /<provider>
+# with an optional artificial delay per provider, so the
+# snapshot fetcher can be exercised offline:
+#
+#   python scripts/stub_provider_server.py --run 2026-02-17T17-29Z \
+#       --delay coinpaprika=1.5 --write-config /tmp/providers.yaml
+#   PROVIDERS_CONFIG=/tmp/providers.yaml CMC_API_KEY=stub \
+#       python scripts/snapshot_fetcher.py
+#
+# It also answers CoinGecko's /coins/list and /coins/markets
+# from the same snapshot:
+#
+#   COINGECKO_API_URL=http://127.0.0.1:8765 \
+#       python scripts/collect_top10_marketcap.py
+# --------------------------------------------------
+
+
+def coingecko_routes(payload_dir):
+    # /coins/list and /coins/markets stand-ins built from the
+    # snapshot's CoinGecko markets payload (used by collect_top10_marketcap)
+    markets = json.loads(read_payload(payload_dir, "coingecko"))
+
+    def coin_list(query):
+        return [{"id": c["id"], "symbol": c["symbol"], "name": c["name"]} for c in markets]
+
+    def coin_markets(query):
+        ids = set(query.get("ids", [""])[0].split(","))
+        return [c for c in markets if c["id"] in ids]
+
+    return {"coins/list": coin_list, "coins/markets": coin_markets}
+
+
+def make_handler(payload_dir, delays, hits):
+    routes = coingecko_routes(payload_dir) if has_payload(payload_dir, "coingecko") else {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            route = url.path.strip("/")
+            hits[route] = hits.get(route, 0) + 1
+
+            time.sleep(delays.get(route, 0))
+
+            if route in routes:
+                body = json.dumps(routes[route](parse_qs(url.query))).encode()
+            elif route and "/" not in route and has_payload(payload_dir, route):
+                body = read_payload(payload_dir, route)
+            else:
+                self.send_error(404)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return Handler
+
+
+def write_config(path, base_url, source_cfg):
+    cfg = yaml.safe_load(open(source_cfg))
+    for p in cfg["providers"]:
+        p["api_url"] = f"{base_url}/{p['name']}"
+    with open(path, "w") as f:
+        yaml.safe_dump(cfg, f, sort_keys=False)
+
+
+def serve(run_id, host="127.0.0.1", port=8765, delays=None):
+    hits = {}
+    server = ThreadingHTTPServer(
+        (host, port),
+        make_handler(SNAPSHOTS_DIR / run_id, delays or {}, hits),
+    )
+    server.hits = hits
+    return server
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--run", required=True, help="snapshot run_id to serve")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--delay", action="append", default=[], help="provider=seconds")
+    ap.add_argument("--write-config", help="write a providers.yaml pointing here")
+    args = ap.parse_args()
+
+    delays = {
+        name: float(sec)
+        for name, sec in (d.split("=", 1) for d in args.delay)
+    }
+
+    server = serve(args.run, port=args.port, delays=delays)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    if args.write_config:
+        write_config(
+            args.write_config,
+            base_url,
+            Path(__file__).resolve().parent.parent / "config/providers.yaml",
+        )
+        print("Config written:", args.write_config)
+
+    print(f"Serving {args.run} at {base_url}")
+    try:
+        server.serve_forever()
+    finally:
+        print("Requests:", server.hits)
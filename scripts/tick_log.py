@@ -0,0 +1,444 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+from pathlib import Path
+
+# --------------------------------------------------
+# Tick log: append-only, size-bounded segments
+#
+# The record of every tick, and the only tick output committed
+# to git:
+#
+#   index_data/ticks/000001.jsonl   sealed segments (immutable)
+#   index_data/ticks/000002.jsonl   active segment (appended)
+#   index_data/ticks/HEAD.json      active segment, its committed
+#                                   length, last tick time
+#
+# One compact JSON line per tick:
+#   {"t": time, "raw": raw value, "value": index value,
+#    "run": run_id, "collected": collect time,
+#    "rows": [[symbol, rank, weight, entry_market_cap, market_cap], ...],
+#    "family": {name: [raw value, index value], ...},
+#    "state": {path: JSON content, ...}}      (only when changed)
+#
+# A segment is sealed once the next line would take it past
+# SEGMENT_BYTES, so a tick commit touches one small file plus
+# HEAD.json.
+#
+# The log is also the tick's write-ahead journal. A tick:
+#
+#   1. computes everything, writing nothing
+#   2. appends its record and fsyncs the segment  ← durable here
+#   3. applies it: state files ("state" in the record) and the
+#      derived outputs, each published by atomic rename
+#   4. advances HEAD.json (length + "applied" watermark)
+#
+# One fsync per tick: steps 3 and 4 are not synced, as the
+# journal can always redo them. recover() runs before every tick
+# and rebalance: journal lines past HEAD are adopted (a torn last
+# line is cut), and if "applied" lags the last record, its state
+# writes are replayed and the derived outputs rebuilt.
+#
+# Everything else a tick writes (index_history.*, rollup tiers,
+# analytics, the constituent archive, docs/data/*) is derived and
+# can be regenerated:
+#
+#   python scripts/tick_log.py rebuild
+#   python scripts/tick_log.py migrate   (one-off: seed from the
+#                                         pre-segment history)
+# --------------------------------------------------
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = BASE_DIR / "index_data"
+TICKS_DIR = DATA_DIR / "ticks"
+HEAD_FILE = TICKS_DIR / "HEAD.json"
+
+SEGMENT_BYTES = 64 * 1024
+
+ROW_FIELDS = ["symbol", "rank", "weight", "entry_market_cap", "market_cap"]
+
+
+def segment_file(seq):
+    return TICKS_DIR / f"{seq:06d}.jsonl"
+
+
+def load_head():
+    if not HEAD_FILE.exists():
+        return None
+    with open(HEAD_FILE) as f:
+        return json.load(f)
+
+
+def save_head(head):
+    tmp = HEAD_FILE.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(head, f, indent=2)
+        f.write("\n")
+    os.replace(tmp, HEAD_FILE)
+
+
+def write_atomic(path, data):
+    # Readers see the old or the new file, never a partial one.
+    # Not fsynced: a lost write is redone from the journal.
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w" if isinstance(data, str) else "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def encode(record):
+    return (json.dumps(record, separators=(",", ":")) + "\n").encode()
+
+
+def make_record(timestamp, raw_value, index_value, run_id, rows=None, family=None, state=None):
+    record = {"t": timestamp, "raw": raw_value, "value": index_value, "run": run_id}
+    if rows:
+        record["collected"] = rows[0].get("timestamp_utc", timestamp)
+        record["rows"] = [[r[k] for k in ROW_FIELDS] for r in rows]
+    if family:
+        record["family"] = {r["name"]: [r["raw_value"], r["index_value"]] for r in family}
+    if state:
+        record["state"] = state
+    return record
+
+
+def state_key(path):
+    return Path(path).relative_to(BASE_DIR).as_posix()
+
+
+def apply_state(record):
+    for key, content in record.get("state", {}).items():
+        path = BASE_DIR / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_atomic(path, json.dumps(content, indent=2))
+
+
+# --------------------------------------------------
+# Writes
+# --------------------------------------------------
+
+def new_head(segment=1, applied=None):
+    return {"segment": segment, "ticks": 0, "bytes": 0, "last_time": None, "applied": applied}
+
+
+def fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def append(record, sync=True):
+    # Journal write; the caller applies the record, then commit()s
+    # the returned head. Call recover() first: anything past HEAD
+    # is overwritten here.
+    line = encode(record)
+    head = load_head() or new_head()
+
+    sealed = head["ticks"] and head["bytes"] + len(line) > SEGMENT_BYTES
+    if sealed:
+        # Seal: the full segment is never written again
+        head = new_head(head["segment"] + 1, head.get("applied"))
+
+    TICKS_DIR.mkdir(parents=True, exist_ok=True)
+    with open(segment_file(head["segment"]), "ab") as f:
+        if f.tell() != head["bytes"]:
+            f.truncate(head["bytes"])
+            f.seek(head["bytes"])
+        f.write(line)
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+    if sync and (sealed or head["bytes"] == 0):
+        fsync_dir(TICKS_DIR)
+
+    head["ticks"] += 1
+    head["bytes"] += len(line)
+    head["last_time"] = record["t"]
+    return head
+
+
+def commit(head):
+    head["applied"] = head["last_time"]
+    save_head(head)
+
+
+# --------------------------------------------------
+# Reads
+# --------------------------------------------------
+
+def read():
+    head = load_head()
+    if head is None:
+        return
+
+    for seq in range(1, head["segment"] + 1):
+        with open(segment_file(seq), "rb") as f:
+            # The active segment is read up to its committed length
+            data = f.read(head["bytes"]) if seq == head["segment"] else f.read()
+        for line in data.splitlines():
+            yield json.loads(line)
+
+
+def last():
+    # Last committed record (a segment is only started by a write)
+    head = load_head()
+    if head is None or not head["bytes"]:
+        return None
+    with open(segment_file(head["segment"]), "rb") as f:
+        data = f.read(head["bytes"])
+    return json.loads(data.splitlines()[-1])
+
+
+def last_value():
+    # Last committed record carrying an index value
+    record = last()
+    if record is None or record.get("value") is not None:
+        return record
+    found = None
+    for r in read():
+        if r.get("value") is not None:
+            found = r
+    return found
+
+
+def scan(path, offset):
+    # Complete journal lines from offset → (records, end offset)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+
+    records, end = [], offset
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n"):
+            break
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            break
+        end += len(line)
+    return records, end
+
+
+def record_rows(record):
+    rows = [dict(zip(ROW_FIELDS, r)) for r in record.get("rows") or []]
+    for r in rows:
+        r["timestamp_utc"] = record.get("collected", record["t"])
+    return rows
+
+
+# --------------------------------------------------
+# Rebuild derived outputs
+# --------------------------------------------------
+
+def rebuild():
+    from history_store import HistoryStore, HISTORY_BIN, HISTORY_CSV
+    from constituent_archive import ConstituentArchive, ARCHIVE_DIR
+    import analytics
+    import collect_top10_marketcap
+    import index_family
+    import index_runner
+    import rollups
+
+    records = list(read())
+    if not records:
+        raise RuntimeError(f"No ticks in {TICKS_DIR}")
+
+    index_runner.DOCS_DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    # History store (+ CSV export); legacy points without a raw
+    # value only ever reached the dashboard series
+    for path in (HISTORY_BIN, HISTORY_CSV):
+        path.unlink(missing_ok=True)
+    store = HistoryStore(csv_path=None)
+    family_stores = {}
+    for name in {n for r in records for n in r.get("family", {})}:
+        path = index_family.index_dir(name) / "index_history.bin"
+        path.unlink(missing_ok=True)
+        family_stores[name] = index_family.history(name)
+
+    shutil.rmtree(ARCHIVE_DIR, ignore_errors=True)
+    archive = ConstituentArchive()
+
+    for r in records:
+        if r["raw"] is not None:
+            store.append(r["t"], r["raw"], r["value"])
+        for name, (raw_value, index_value) in r.get("family", {}).items():
+            family_stores[name].append(r["t"], raw_value, index_value)
+        if r.get("rows"):
+            archive.append(r["t"], record_rows(r), r["run"])
+
+    store.export_csv(HISTORY_CSV)
+
+    # Every point, including those without a raw value
+    rollups.rebuild([(r["t"], r["value"]) for r in records if r["value"] is not None])
+    analytics.publish(analytics.rebuild(store))
+
+    # Dashboard series: the last MAX_POINTS ticks
+    last = records[-1]
+    dashboard = {
+        "symbol": rollups.SYMBOL,
+        "interval": "30m",
+        "last_updated": last["t"],
+        "data": [
+            {"time": r["t"], "value": round(float(r["value"]), 6)}
+            for r in records[-index_runner.MAX_POINTS:]
+        ],
+    }
+    write_atomic(index_runner.DASHBOARD_JSON, json.dumps(dashboard, indent=2))
+
+    # Latest constituents, from the last tick that recorded them
+    latest = next((r for r in reversed(records) if r.get("rows")), None)
+    if latest:
+        rows = record_rows(latest)
+        collect_top10_marketcap.write(rows, quiet=True)
+        index_runner.update_constituents(rows, latest["t"])
+
+    latest = next((r for r in reversed(records) if r.get("family")), None)
+    if latest:
+        family = index_family.load_constituents(latest["run"])
+
+        # A fresh clone may have history for an index whose state was
+        # never written: its definition names the weighting
+        weightings = {}
+        for name in latest["family"]:
+            state = index_family.load_state(name)
+            if state is not None:
+                weightings[name] = state["weighting"]
+        if len(weightings) < len(latest["family"]):
+            definitions = {d["name"]: d for d in index_family.load_definitions()}
+            for name in latest["family"]:
+                weightings.setdefault(name, definitions.get(name, {}).get("weighting"))
+
+        index_family.publish(latest["t"], [
+            {
+                "name": name,
+                "weighting": weightings[name],
+                "size": len(family.get(name, [])),
+                "value": round(index_value, 6),
+                "raw_value": raw_value,
+                "index_value": index_value,
+            }
+            for name, (raw_value, index_value) in latest["family"].items()
+        ])
+
+    return records
+
+
+# --------------------------------------------------
+# Recovery
+# --------------------------------------------------
+
+def recover():
+    # → True if anything had to be redone
+    head = load_head()
+    if head is None:
+        return False
+
+    active = segment_file(head["segment"])
+    following = segment_file(head["segment"] + 1)
+    if (
+        active.stat().st_size == head["bytes"]
+        and not following.exists()
+        and head.get("applied") == head["last_time"]
+    ):
+        return False
+
+    # Adopt journal lines written after the last commit, cutting
+    # a torn tail (the torn tick never happened)
+    def adopt(path, head):
+        records, end = scan(path, head["bytes"])
+        with open(path, "r+b") as f:
+            f.truncate(end)
+        if records:
+            head["ticks"] += len(records)
+            head["bytes"] = end
+            head["last_time"] = records[-1]["t"]
+        return records
+
+    adopt(active, head)
+    if following.exists():
+        sealed = new_head(head["segment"] + 1, head.get("applied"))
+        if adopt(following, sealed):
+            head = sealed
+        else:
+            following.unlink()
+    save_head(head)
+
+    if head.get("applied") != head["last_time"]:
+        from history_store import to_micros
+
+        applied = head.get("applied")
+        since = None if applied is None else to_micros(applied)
+        pending = [r for r in read() if since is None or to_micros(r["t"]) > since]
+        for r in pending:
+            apply_state(r)
+        rebuild()
+        commit(head)
+        print(f"▶ Recovered {len(pending)} unapplied tick(s) from the journal")
+
+    return True
+
+
+# --------------------------------------------------
+# One-off migration from the pre-segment outputs
+# --------------------------------------------------
+
+def migrate():
+    from history_store import HistoryStore, HISTORY_CSV, to_micros
+    import collect_top10_marketcap
+    import index_runner
+
+    if load_head() is not None:
+        raise RuntimeError(f"{HEAD_FILE} exists, already migrated")
+
+    # The dashboard series reaches further back than the history
+    # store; those points are kept without a raw value
+    records = {}
+    dashboard = index_runner.load_dashboard() or {"data": []}
+    for p in dashboard["data"]:
+        records[p["time"]] = make_record(p["time"], None, p["value"], None)
+    for r in HistoryStore(csv_path=HISTORY_CSV).read_range():
+        records[r["timestamp_utc"]] = make_record(r["timestamp_utc"], r["raw_value"], r["index_value"], None)
+
+    records = sorted(records.values(), key=lambda r: to_micros(r["t"]))
+
+    # Only the last tick's constituents survive in the old layout
+    if collect_top10_marketcap.OUT_FILE.exists() and records:
+        with open(collect_top10_marketcap.OUT_FILE, newline="") as f:
+            rows = list(csv.DictReader(f))
+        for r in rows:
+            r["market_cap"] = json.loads(r["market_cap"])
+        last = records[-1]
+        records[-1] = make_record(
+            last["t"], last["raw"], last["value"],
+            collect_top10_marketcap.current_run_id(), rows,
+        )
+
+    head = None
+    for r in records:
+        head = append(r, sync=False)
+        commit(head)
+    return len(records), head
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("command", choices=["rebuild", "migrate", "head"])
+    args = ap.parse_args()
+
+    if args.command == "migrate":
+        n, head = migrate()
+        if head is None:
+            print("▶ No legacy history, nothing to migrate")
+        else:
+            print(f"▶ {n} ticks → {head['segment']} segment(s) in {TICKS_DIR}")
+    elif args.command == "rebuild":
+        records = rebuild()
+        print(f"▶ Rebuilt derived outputs from {len(records)} ticks")
+    else:
+        print(json.dumps(load_head(), indent=2))
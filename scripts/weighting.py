@@ -0,0 +1,107 @@
+import math
+
+import numpy as np
+
+# --------------------------------------------------
+# Weighting engine (rebalance path)
+#
+# An index definition (config/index.yaml: the flagship "index:"
+# and every "indices:" entry) names its scheme in "weighting":
+#
+#   rank_table          fixed weight per rank (needs rank_weights)
+#   market_cap          cap / Σ caps
+#   sqrt_cap            √cap / Σ √caps
+#   equal               1 / N
+#   capped_market_cap   market_cap clipped at "cap", the excess
+#                       redistributed pro rata (iteratively)
+#
+# A scheme maps the entry market caps of the selected
+# constituents (NumPy array, largest first) and the definition
+# to weights; adding one is a function plus a WEIGHTINGS entry.
+#
+# Selection takes the top K by market cap with a partial
+# selection (argpartition, O(n)) and only sorts those K.
+# --------------------------------------------------
+
+
+def top_k(market_caps, k):
+    # → positions of the k largest caps, largest first; ties keep
+    # row order (as a stable sort would), missing caps rank last
+    key = -np.nan_to_num(np.asarray(market_caps, dtype=float), nan=-np.inf)
+    k = min(k, len(key))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+
+    kth = np.partition(key, k - 1)[k - 1]
+    above = np.flatnonzero(key < kth)
+    tied = np.flatnonzero(key == kth)[: k - len(above)]
+    chosen = np.concatenate([above, tied])
+    return chosen[np.lexsort((chosen, key[chosen]))]
+
+
+# --------------------------------------------------
+# Schemes: caps (descending) → weights
+# --------------------------------------------------
+
+def weight_rank_table(caps, d):
+    table = np.asarray(d["rank_weights"], dtype=float)
+    return table[: len(caps)]
+
+
+def weight_market_cap(caps, d):
+    return caps / math.fsum(caps)
+
+
+def weight_sqrt_cap(caps, d):
+    root = np.sqrt(caps)
+    return root / math.fsum(root)
+
+
+def weight_equal(caps, d):
+    return np.full(len(caps), 1.0 / len(caps))
+
+
+def weight_capped_market_cap(caps, d):
+    cap = float(d["cap"])
+    if cap * len(caps) < 1:
+        raise RuntimeError(f"{d['name']}: cap {cap} infeasible for {len(caps)} constituents")
+
+    # Clip at the cap and hand the excess to the uncapped names
+    # pro rata; repeat until nothing exceeds the cap
+    weights = weight_market_cap(caps, d)
+    capped = np.zeros(len(caps), dtype=bool)
+    while True:
+        over = ~capped & (weights > cap)
+        if not over.any():
+            return weights
+        capped |= over
+
+        excess = 1.0 - cap * capped.sum()
+        free_total = math.fsum(caps[~capped])
+        if free_total <= 0:
+            return np.where(capped, cap, 0.0)
+        weights = np.where(capped, cap, excess * caps / free_total)
+
+
+WEIGHTINGS = {
+    "rank_table": weight_rank_table,
+    "market_cap": weight_market_cap,
+    "sqrt_cap": weight_sqrt_cap,
+    "equal": weight_equal,
+    "capped_market_cap": weight_capped_market_cap,
+}
+
+
+def validate(d):
+    scheme = d.get("weighting")
+    if scheme not in WEIGHTINGS:
+        raise RuntimeError(f"{d['name']}: unknown weighting {scheme!r}")
+    if scheme == "capped_market_cap" and "cap" not in d:
+        raise RuntimeError(f"{d['name']}: capped_market_cap needs a cap")
+    if scheme == "rank_table" and len(d.get("rank_weights") or []) < d["size"]:
+        raise RuntimeError(f"{d['name']}: rank_weights needs one weight per rank (size {d['size']})")
+    return d
+
+
+def weights(caps, d):
+    return WEIGHTINGS[d["weighting"]](np.asarray(caps, dtype=float), d)
@@ -0,0 +1,19 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The scripts import each other as top-level modules
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import tick_log  # noqa: E402
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    # An empty tick log (and state-file root) under tmp_path
+    ticks = tmp_path / "index_data" / "ticks"
+    monkeypatch.setattr(tick_log, "BASE_DIR", tmp_path)
+    monkeypatch.setattr(tick_log, "TICKS_DIR", ticks)
+    monkeypatch.setattr(tick_log, "HEAD_FILE", ticks / "HEAD.json")
+    return tmp_path
@@ -0,0 +1,80 @@
+import threading
+
+import pytest
+
+import coordination
+import index_runner
+import run_rebalance
+
+
+@pytest.fixture
+def pointer(tmp_path, monkeypatch):
+    data = tmp_path / "index_data"
+    data.mkdir()
+    monkeypatch.setattr(coordination, "DATA_DIR", data)
+    monkeypatch.setattr(coordination, "LOCKS_DIR", data / "locks")
+    monkeypatch.setattr(coordination, "STATE_FILE", data / "index_state.json")
+    return data
+
+
+def test_publish_state_bumps_the_version(pointer):
+    assert coordination.read_state() is None
+
+    first = coordination.new_state(None, "run-a", 2.0, base_value=1000.0)
+    coordination.publish_state(first)
+    assert coordination.read_state() == {"base_value": 1000.0, "version": 1, "run_id": "run-a", "divisor": 2.0}
+
+    coordination.publish_state(coordination.new_state(first, "run-b", 3.0))
+    state = coordination.read_state()
+    assert (state["version"], state["run_id"], state["divisor"]) == (2, "run-b", 3.0)
+    assert state["base_value"] == 1000.0
+    assert [p.name for p in pointer.iterdir()] == ["index_state.json"]
+
+
+def test_tick_state_goes_stale_on_a_new_version(pointer):
+    first = coordination.new_state(None, "run-a", 2.0)
+    coordination.publish_state(first)
+
+    state = index_runner.TickState()
+    assert state.stale()
+    state.stamp = index_runner.state_stamp(*index_runner.read_pointer())
+    assert not state.stale()
+
+    # Same run and divisor, new version (e.g. an emergency re-publish)
+    coordination.publish_state(coordination.new_state(first, "run-a", 2.0))
+    assert state.stale()
+
+
+def test_lease_contention_times_out_then_frees(pointer):
+    held, release = threading.Event(), threading.Event()
+
+    def holder():
+        with coordination.lease("index", "tick"):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=holder)
+    thread.start()
+    try:
+        held.wait(5)
+        with pytest.raises(coordination.LeaseTimeout, match='"purpose": "tick"'):
+            with coordination.lease("index", "rebalance", timeout=0.2):
+                pass
+    finally:
+        release.set()
+        thread.join()
+
+    with coordination.lease("index", "rebalance", timeout=0.2):
+        pass
+
+
+def test_continuity_without_journal_history_raises(pointer, journal, monkeypatch):
+    run = journal / "ares_eval" / "run-b"
+    run.mkdir(parents=True)
+    (run / "continuity_marketcaps.csv").write_text("symbol,weight,market_cap\nBTC,1.0,100\n")
+    monkeypatch.setattr(run_rebalance, "BASE", journal)
+    coordination.publish_state(coordination.new_state(None, "run-a", 2.0))
+
+    with pytest.raises(RuntimeError, match="no index value"):
+        run_rebalance.apply_continuity("run-b")
+    assert coordination.read_state()["run_id"] == "run-a"
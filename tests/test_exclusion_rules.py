@@ -0,0 +1,49 @@
+import pandas as pd
+import pytest
+
+import exclusion_rules
+
+
+def compiled(auto, human=None):
+    rules = exclusion_rules.compile_rules(auto, human or {})
+    return rules, exclusion_rules.pattern_regex(rules)
+
+
+def labels(rules, symbols):
+    return exclusion_rules.matching_rules(pd.DataFrame({"symbol": symbols}), rules).tolist()
+
+
+@pytest.mark.parametrize("source", ["^(w)eth$", "^(?P<x>w)eth$"])
+def test_capturing_regex_rejected(source):
+    with pytest.raises(RuntimeError, match="must not capture"):
+        exclusion_rules.compile_rules({"wrapped": [{"regex": source}]}, {})
+
+
+def test_global_inline_flag_rejected():
+    with pytest.raises(RuntimeError, match="global flags"):
+        exclusion_rules.compile_rules({"misc": [{"regex": "(?i)^foo"}]}, {})
+
+
+def test_invalid_regex_rejected():
+    with pytest.raises(RuntimeError, match="Invalid regex"):
+        exclusion_rules.compile_rules({"misc": [{"regex": "^(foo"}]}, {})
+
+
+def test_pattern_rules_label_the_rule_that_fired():
+    rules = compiled({
+        "wrapped": [{"regex": "^(?:w|c)eth$"}, {"prefix": "w"}],
+        "stablecoins": [{"regex": "(?i:^usd)"}, "dai"],
+    })
+    assert labels(rules, ["WETH", "CETH", "WBTC", "USDX", "DAI", "BTC"]) == [
+        "wrapped:regex=^(?:w|c)eth$",
+        "wrapped:regex=^(?:w|c)eth$",
+        "wrapped:prefix=w",
+        "stablecoins:regex=(?i:^usd)",
+        "stablecoins:dai",
+        None,
+    ]
+
+
+def test_human_override_takes_precedence():
+    rules = compiled({"stablecoins": ["usdt"]}, {"blacklist": [{"symbol": "USDT"}]})
+    assert labels(rules, ["usdt"]) == ["human_override:USDT"]
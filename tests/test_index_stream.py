@@ -0,0 +1,30 @@
+import index_stream
+
+
+ROWS = [
+    {"symbol": "BTC", "weight": "0.6", "market_cap": "1000"},
+    {"symbol": "ETH", "weight": "0.4", "market_cap": "500"},
+]
+
+
+def test_bad_line_mid_feed_is_skipped(tmp_path, monkeypatch):
+    feed = tmp_path / "updates.jsonl"
+    feed.write_text(
+        '{"symbol": "BTC", "market_cap": 1100}\n'
+        '{"symbol": "ETH", "market_ca\n'
+        'not json\n'
+        '{"symbol": "ETH", "market_cap": 600}\n'
+    )
+    monkeypatch.setattr(index_stream, "load_index", lambda: (1, index_stream.StreamingIndex(ROWS, 10.0)))
+    monkeypatch.setattr(index_stream, "pointer_version", lambda: 1)
+
+    index, point, _ = index_stream.run(index_stream.replay_feed(feed), every=3600)
+
+    assert index.updates == 2
+    assert index.skipped == 2
+    assert point["raw_value"] == 0.6 * 1100 + 0.4 * 600
+
+
+def test_parse_line_passes_undecodable_bytes_as_text():
+    assert index_stream.parse_line(b'{"symbol": "BTC"}') == {"symbol": "BTC"}
+    assert index_stream.parse_line(b"\xff{") == "�{"
@@ -0,0 +1,48 @@
+import json
+import tracemalloc
+
+import normalize
+import provider_registry
+
+UNIVERSE = 100_000
+TOP_N = 50
+
+
+def write_tickers(snap, n):
+    # CoinPaprika-shaped universe, caps in shuffled order
+    with open(snap / "coinpaprika.json", "w") as f:
+        f.write("[")
+        for i in range(n):
+            cap = (i * 7919) % n
+            f.write(("," if i else "") + json.dumps({
+                "id": f"s{i}-coin-{i}",
+                "name": f"Coin {i}",
+                "symbol": f"S{i}",
+                "rank": i + 1,
+                "circulating_supply": 1000.0,
+                "quotes": {"USD": {"price": 1.0, "market_cap": cap, "volume_24h": 1.0}},
+            }))
+        f.write("]")
+
+
+def test_streamed_top_n_memory_is_bounded(tmp_path):
+    write_tickers(tmp_path, UNIVERSE)
+    spec = dict(provider_registry.load()["coinpaprika"], top_n=TOP_N)
+
+    tracemalloc.start()
+    df = normalize.normalize(tmp_path, spec)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    assert df["market_cap"].tolist() == list(range(UNIVERSE - 1, UNIVERSE - 1 - TOP_N, -1))
+    assert df["slug"].iloc[0].startswith("coin-")
+    # The payload is ~20 MB of JSON; only the top_n records may be held
+    assert peak < 4 * 1024 * 1024
+
+
+def test_streamed_top_n_ties_keep_payload_order(tmp_path):
+    rows = [{"id": f"a{i}-a", "symbol": f"A{i}", "quotes": {"USD": {"market_cap": 5}}} for i in range(4)]
+    (tmp_path / "coinpaprika.json").write_text(json.dumps(rows))
+    spec = dict(provider_registry.load()["coinpaprika"], top_n=2)
+
+    assert normalize.normalize(tmp_path, spec)["symbol"].tolist() == ["A0", "A1"]
@@ -0,0 +1,32 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import rollups
+import tick_log
+
+
+def test_rebuild_keeps_value_only_points(journal, monkeypatch):
+    monkeypatch.setattr(rollups, "DOCS_DATA_DIR", journal / "docs" / "data")
+    monkeypatch.setattr(rollups, "STATE_FILE", journal / "rollups_state.json")
+    monkeypatch.setattr(rollups, "MANIFEST", journal / "docs" / "data" / "index_rollups.json")
+    rollups.DOCS_DATA_DIR.mkdir(parents=True)
+
+    # Ten days of 30-minute ticks; the first 100 are legacy points
+    # with an index value but no raw value
+    start = datetime(2026, 1, 1, 0, 15, tzinfo=timezone.utc)
+    times = [(start + timedelta(minutes=30 * i)).isoformat() for i in range(480)]
+    for i, t in enumerate(times):
+        raw = None if i < 100 else 1000.0 + i
+        tick_log.commit(tick_log.append(tick_log.make_record(t, raw, 1000.0 + i, "run"), sync=False))
+
+    rollups.rebuild()
+
+    epochs = [int(datetime.fromisoformat(t).timestamp()) for t in times]
+    for name, seconds in rollups.TIERS.items():
+        with open(rollups.tier_file(name)) as f:
+            data = json.load(f)["data"]
+        expected = epochs if seconds is None else sorted({rollups.bucket_start(t, seconds) for t in epochs})
+        assert [row[0] for row in data] == expected, name
+
+    with open(rollups.MANIFEST) as f:
+        assert json.load(f)["tiers"]["30m"]["points"] == len(times)
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+import tick_log
+
+
+def record(t, value, state=None):
+    return tick_log.make_record(t, value, value, "run", state=state)
+
+
+@pytest.fixture
+def rebuilds(monkeypatch):
+    # recover() redoes the derived outputs; only count the calls here
+    calls = []
+    monkeypatch.setattr(tick_log, "rebuild", lambda: calls.append(True))
+    return calls
+
+
+def test_crash_between_append_and_commit_is_recovered(journal, rebuilds):
+    tick_log.commit(tick_log.append(record("2026-03-01T00:00:00+00:00", 1000.0), sync=False))
+
+    # Journal written, state not applied, HEAD not advanced: the crash
+    state = {"index_data/index_state.json": {"version": 2, "run_id": "run", "divisor": 2.0}}
+    tick_log.append(record("2026-03-01T00:30:00+00:00", 1001.0, state), sync=False)
+    assert tick_log.load_head()["ticks"] == 1
+
+    assert tick_log.recover() is True
+
+    head = tick_log.load_head()
+    assert head["ticks"] == 2
+    assert head["applied"] == head["last_time"] == "2026-03-01T00:30:00+00:00"
+    assert [r["value"] for r in tick_log.read()] == [1000.0, 1001.0]
+    assert json.loads((journal / "index_data" / "index_state.json").read_text())["version"] == 2
+    assert rebuilds == [True]
+
+    # Nothing left to redo
+    assert tick_log.recover() is False
+    assert rebuilds == [True]
+
+
+def test_torn_tail_is_cut(journal, rebuilds):
+    head = tick_log.append(record("2026-03-01T00:00:00+00:00", 1000.0), sync=False)
+    tick_log.commit(head)
+
+    segment = tick_log.segment_file(head["segment"])
+    with open(segment, "ab") as f:
+        f.write(b'{"t":"2026-03-01T00:30:00+00:00","raw":10')
+
+    assert tick_log.recover() is True
+    assert segment.stat().st_size == tick_log.load_head()["bytes"]
+    assert [r["value"] for r in tick_log.read()] == [1000.0]
+    assert rebuilds == []
+
+
+def test_last_value_skips_records_without_one(journal):
+    assert tick_log.last_value() is None
+    tick_log.commit(tick_log.append(record("2026-03-01T00:00:00+00:00", 1000.0), sync=False))
+    tick_log.commit(tick_log.append(record("2026-03-01T00:30:00+00:00", None), sync=False))
+    assert tick_log.last_value()["value"] == 1000.0